@@ -0,0 +1,67 @@
+import argparse
+import sys
+
+from bench.suite import (
+    BASELINE_PATH, DEFAULT_TOLERANCE, SCALES, compare, format_rows, load_baseline, run_suite,
+    save_baseline,
+)
+
+REPEAT = 5
+# A baseline is compared against every later run, so it is recorded over
+# more runs to land near the middle of this machine's spread
+BASELINE_REPEAT = 15
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python3 -m bench",
+        description="Time each layer of the generator against a stored baseline.",
+    )
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument(
+        "--repeat", type=int,
+        help=f"runs per benchmark (default {REPEAT}, {BASELINE_REPEAT} with --update-baseline)",
+    )
+    parser.add_argument("--only", action="append", metavar="NAME", help="run just this benchmark")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE,
+        help="fail when a benchmark is this fraction slower than its baseline",
+    )
+    parser.add_argument(
+        "--update-baseline", action="store_true",
+        help="record these results as the new baseline instead of comparing",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    repeat = args.repeat or (BASELINE_REPEAT if args.update_baseline else REPEAT)
+    results = run_suite(args.scale, repeat, args.only)
+    baseline = load_baseline(args.baseline)
+
+    if args.update_baseline:
+        recorded = baseline.setdefault(args.scale, {})
+        if args.only is None:
+            recorded.clear()
+        relative_times = recorded.setdefault("relative", {})
+        for name, (_, relative) in results.items():
+            relative_times[name] = relative
+        save_baseline(baseline, args.baseline)
+        print(format_rows(compare(results, None)))
+        print(f"baseline for scale {args.scale!r} written to {args.baseline}")
+        return 0
+
+    rows = compare(results, baseline.get(args.scale), args.tolerance)
+    print(format_rows(rows))
+    regressions = [name for name, _, _, regressed in rows if regressed]
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}: "
+              f"{', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench.corpus import CorpusGenerator
+from batch import make_executor, render_many
+from block_markdown import markdown_to_html_node
+
+
+def snippets(count, seed=5):
+    # Comment-sized documents, a few of them repeated the way "+1" and
+    # "Thanks!" are in real comment threads
+    generator = CorpusGenerator(seed)
+    stock = ["Thanks!", "+1", "Looks good to me.", "**Fixed** in the latest build."]
+    documents = []
+    for i in range(count):
+        if generator.rng.random() < 0.1:
+            documents.append(generator.rng.choice(stock))
+        else:
+            documents.append("\n\n".join(generator.block() for _ in range(generator.rng.randint(1, 3))))
+    return documents
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    jobs = os.cpu_count() or 1
+    with make_executor(jobs) as executor:
+        render_many(snippets(64), threshold=1, executor=executor)  # start the workers
+        for count in (100, 1000, 10000, 50000):
+            documents = snippets(count)
+            loop = timed(lambda: [markdown_to_html_node(md).to_html() for md in documents])
+            serial = timed(lambda: render_many(documents))
+            pooled = timed(lambda: render_many(documents, threshold=1, executor=executor))
+            print(f"{count} snippets")
+            print(f"  loop of single calls: {count / loop:9.0f} docs/s")
+            print(f"  render_many serial:   {count / serial:9.0f} docs/s")
+            print(f"  render_many {jobs} jobs:  {count / pooled:9.0f} docs/s")
+
+
+if __name__ == "__main__":
+    main()
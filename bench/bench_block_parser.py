@@ -0,0 +1,131 @@
+import os
+import sys
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench.corpus import generate_document
+from bench.suite import best_of
+import block_markdown
+from block_markdown import markdown_to_html_node
+from htmlnode import LeafNode, ParentNode
+
+# The block pipeline before the line parser, kept here as the baseline:
+# split on blank lines, strip every line, then classify each block by its
+# first character and build it on its own. Inline text goes through
+# block_markdown.text_to_children, as in the line parser.
+
+
+def iter_blocks(lines):
+    block_lines = []
+    for line in lines:
+        if line == "":
+            if block_lines:
+                block = "\n".join(block_lines).strip()
+                if block:
+                    yield block
+                block_lines = []
+            continue
+        block_lines.append(line.strip())
+    if block_lines:
+        block = "\n".join(block_lines).strip()
+        if block:
+            yield block
+
+
+def children(text):
+    return block_markdown.text_to_children(text)
+
+
+def heading_node(block, lines):
+    level = len(block) - len(block.lstrip("#"))
+    if 1 <= level <= 6 and block[level:level + 1] == " ":
+        return ParentNode(f"h{level}", children(block[level + 1:]))
+    return paragraph_node(block, lines)
+
+
+def code_node(block, lines):
+    if len(lines) >= 2 and lines[0].startswith("```") and lines[-1] == "```":
+        return ParentNode("pre", [LeafNode("code", block[4:-3])])
+    return paragraph_node(block, lines)
+
+
+def quote_node(block, lines):
+    if not all(line.startswith(">") for line in lines):
+        return paragraph_node(block, lines)
+    text = " ".join(line.lstrip(">").strip() for line in lines if line.lstrip(">").strip())
+    return ParentNode("blockquote", children(text))
+
+
+def ulist_node(block, lines):
+    if not all(line.startswith("- ") for line in lines):
+        return paragraph_node(block, lines)
+    return ParentNode("ul", [ParentNode("li", children(line[2:])) for line in lines])
+
+
+def olist_node(block, lines):
+    if not all(line.startswith(f"{i}. ") for i, line in enumerate(lines, 1)):
+        return paragraph_node(block, lines)
+    return ParentNode("ol", [ParentNode("li", children(line[3:])) for line in lines])
+
+
+def paragraph_node(block, lines):
+    return ParentNode("p", children(" ".join(lines)))
+
+
+BUILDERS = {"#": heading_node, "`": code_node, ">": quote_node, "-": ulist_node, "1": olist_node}
+
+
+def splitter_to_html_node(markdown):
+    nodes = []
+    for block in iter_blocks(markdown.split("\n")):
+        nodes.append(BUILDERS.get(block[0], paragraph_node)(block, block.split("\n")))
+    return ParentNode("div", nodes)
+
+
+def nested_lists(items):
+    lines = []
+    for i in range(items):
+        lines.append(f"{'  ' * (i % 4)}- item {i} with some **bold** text")
+    return "\n".join(lines)
+
+
+def large_fence(lines):
+    return "# Code\n\n```\n" + "\n".join(f"    line {i} of code" for i in range(lines)) + "\n```"
+
+
+DOCUMENTS = {
+    "corpus 20k blocks": lambda: generate_document(20000, seed=1),
+    "nested lists 50k": lambda: nested_lists(50000),
+    "fence 200k lines": lambda: large_fence(200000),
+}
+
+
+def plain_children(text):
+    return [LeafNode(None, text)]
+
+
+def main():
+    repeat = 3
+    print(f"{'document':<20} {'lines':>8} {'':>10} {'splitter':>10} {'line parser':>12} {'ratio':>6}")
+    for name, make in DOCUMENTS.items():
+        markdown = make()
+        lines = markdown.count("\n") + 1
+        # Block structure alone, with inline parsing stubbed out for both
+        with mock.patch("block_markdown.text_to_children", plain_children):
+            old = best_of(lambda: splitter_to_html_node(markdown), repeat)
+            new = best_of(lambda: markdown_to_html_node(markdown), repeat)
+        print(
+            f"{name:<20} {lines:>8} {'blocks':>10} {old * 1000:>8.1f}ms {new * 1000:>10.1f}ms "
+            f"{new / old:>5.2f}x"
+        )
+        old = best_of(lambda: splitter_to_html_node(markdown), repeat)
+        new = best_of(lambda: markdown_to_html_node(markdown), repeat)
+        print(
+            f"{'':<20} {'':>8} {'+ inline':>10} {old * 1000:>8.1f}ms {new * 1000:>10.1f}ms "
+            f"{new / old:>5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
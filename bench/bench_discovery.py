@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench.suite import best_of
+from main import collect_files, scan_sources
+from statindex import StatIndex
+
+# Discovery and change detection over a generated content tree: the walk
+# that listed each directory and stat'ed every entry, the scandir walk, and
+# the walk with a stat index saved by a previous run. scan_sources also
+# hashes every source, which the warm index skips for unchanged files.
+
+
+def listdir_walk(source):
+    files = []
+    for item in sorted(os.listdir(source)):
+        if item.startswith("_"):
+            continue
+        item_path = os.path.join(source, item)
+        if os.path.isfile(item_path):
+            files.append(item_path)
+        elif os.path.isdir(item_path):
+            files.extend(listdir_walk(item_path))
+    return files
+
+
+def make_tree(root, dirs, files_per_dir):
+    past = time.time_ns() - 60 * 1_000_000_000
+    content = os.path.join(root, "content")
+    for d in range(dirs):
+        dir_path = os.path.join(content, f"section{d % 20}", f"topic{d}")
+        os.makedirs(dir_path)
+        for f in range(files_per_dir):
+            path = os.path.join(dir_path, f"page{f}.md")
+            with open(path, "w") as out:
+                out.write(f"# Page {d}.{f}\n\n" + "Some text for the page. " * 80)
+            os.utime(path, ns=(past, past))
+    # Age the directories too, so the index trusts their mtimes
+    for dir_path, _, _ in os.walk(content):
+        os.utime(dir_path, ns=(past, past))
+    template = os.path.join(root, "template.html")
+    with open(template, "w") as out:
+        out.write("{{ Content }}")
+    return content, template
+
+
+def warm_index(path, run):
+    index = StatIndex(path)
+    run(index)
+    index.save()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        content, template = make_tree(root, 2000, 10)
+        index_path = os.path.join(root, "stat_index.json")
+        print(f"{'20000 files, 2000 dirs':<24} {'time':>10}")
+        rows = [
+            ("listdir + isfile", lambda: listdir_walk(content)),
+            ("scandir", lambda: collect_files(content)),
+            ("warm index", lambda: collect_files(content, StatIndex(index_path))),
+        ]
+        warm_index(index_path, lambda index: collect_files(content, index))
+        for name, run in rows:
+            print(f"{name:<24} {best_of(run, 5) * 1000:>8.1f}ms")
+
+        docs = os.path.join(root, "docs")
+        os.remove(index_path)
+        cold = best_of(lambda: scan_sources(content, template, docs, "/"), 3)
+        warm_index(index_path, lambda index: scan_sources(content, template, docs, "/", index))
+        warm = best_of(lambda: scan_sources(content, template, docs, "/", StatIndex(index_path)), 3)
+        print(f"{'scan_sources, no index':<24} {cold * 1000:>8.1f}ms")
+        print(f"{'scan_sources, warm':<24} {warm * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
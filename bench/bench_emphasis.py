@@ -0,0 +1,44 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from inline_markdown import text_to_textnodes
+
+# Inputs that make naive emphasis parsers rescan the text for every
+# delimiter. Each is built from n repetitions of a short unit.
+PATHOLOGICAL = {
+    "unmatched *": lambda n: "* " * n,
+    "openers only": lambda n: "*a " * n,
+    "closers only": lambda n: "a* " * n,
+    "unclosed **": lambda n: "**a " * n,
+    "mixed run lengths": lambda n: "*a **b ***c " * (n // 3),
+    "snake_case words": lambda n: "snake_case_name " * n,
+    "nested n deep": lambda n: "*a " * (n // 2) + "b* " * (n // 2),
+    "unmatched backticks": lambda n: "".join("`" * (i % 50 + 1) + " x " for i in range(n)),
+    "open brackets": lambda n: "[a](" * n,
+    "prose with emphasis": lambda n: "some **bold** and _italic_ text " * (n // 4),
+}
+
+
+def best_of(text, repeat=5):
+    return min(timeit.repeat(lambda: text_to_textnodes(text), number=1, repeat=repeat))
+
+
+def main():
+    sizes = (2500, 5000, 10000, 20000)
+    print(f"{'input':<22}" + "".join(f"{size:>10}" for size in sizes) + "   ns/char 20k/2.5k")
+    for name, make in PATHOLOGICAL.items():
+        timings = []
+        for size in sizes:
+            text = make(size)
+            timings.append((best_of(text), len(text)))
+        cells = "".join(f"{seconds * 1000:>8.2f}ms" for seconds, _ in timings)
+        per_char = [seconds / chars * 1e9 for seconds, chars in timings]
+        # Linear parsing keeps the cost per character flat as inputs grow
+        print(f"{name:<22}{cells}   {per_char[-1]:7.0f} {per_char[-1] / per_char[0]:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import os
+import sys
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench.corpus import generate_document
+from bench.suite import best_of
+from block_markdown import markdown_to_html_node
+from htmlnode import URL_PROPS
+
+# Serialize the same tree with escaping and with the old serializer that
+# wrote values verbatim. "dirty" salts the corpus with characters that take
+# the slow path.
+CORPORA = {
+    "clean": lambda blocks: generate_document(blocks, seed=1),
+    "dirty": lambda blocks: generate_document(blocks, seed=1).replace(" the ", " a < b & c > d "),
+}
+
+
+def verbatim_leaf_to_html(self, url_prefix=""):
+    if self.value is None:
+        raise ValueError("invalid HTML: no value")
+    if self.tag is None:
+        return self.value
+    return f"<{self.tag}{self.props_to_html(url_prefix)}>{self.value}</{self.tag}>"
+
+
+def verbatim_props_to_html(self, url_prefix=""):
+    if self.props is None:
+        return ""
+    props_html = ""
+    for prop in self.props:
+        value = self.props[prop]
+        if url_prefix and prop in URL_PROPS and value.startswith("/") and not value.startswith("//"):
+            value = url_prefix + value
+        props_html += f' {prop}="{value}"'
+    return props_html
+
+
+def main():
+    blocks = 5000
+    rounds = 15
+    print(f"{'corpus':<8} {'verbatim':>10} {'escaped':>10} {'overhead':>9}")
+    for name, make in CORPORA.items():
+        tree = markdown_to_html_node(make(blocks))
+        # Alternate the two so drift in machine speed hits both alike
+        escaped = verbatim = float("inf")
+        for _ in range(rounds):
+            escaped = min(escaped, best_of(tree.to_html, 1))
+            with mock.patch("htmlnode.LeafNode.to_html", verbatim_leaf_to_html), \
+                    mock.patch("htmlnode.HTMLNode.props_to_html", verbatim_props_to_html):
+                verbatim = min(verbatim, best_of(tree.to_html, 1))
+        print(
+            f"{name:<8} {verbatim * 1000:>8.2f}ms {escaped * 1000:>8.2f}ms "
+            f"{(escaped / verbatim - 1) * 100:>+8.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
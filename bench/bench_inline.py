@@ -0,0 +1,52 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from inline_markdown import (
+    split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes
+)
+from textnode import TextNode, TextType
+
+
+def chained_text_to_textnodes(text):
+    # The multi-pass pipeline text_to_textnodes used to run
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def link_paragraph(links):
+    parts = []
+    for i in range(links):
+        parts.append(
+            f"see [link number {i}](https://example.com/page/{i}) and **bold {i}** "
+            f"with ![image {i}](/images/{i}.png) plus `code {i}` "
+        )
+    return "".join(parts)
+
+
+def best_of(func, text, repeat=5):
+    number = max(1, 2000 // max(1, len(text) // 100))
+    return min(timeit.repeat(lambda: func(text), number=number, repeat=repeat)) / number
+
+
+def main():
+    print(f"{'links':>6} {'chained ms':>11} {'single-pass ms':>15} {'speedup':>8}")
+    for links in (10, 100, 500, 1000):
+        text = link_paragraph(links)
+        if chained_text_to_textnodes(text) != text_to_textnodes(text):
+            raise SystemExit(f"outputs differ for {links} links")
+        chained = best_of(chained_text_to_textnodes, text)
+        single = best_of(text_to_textnodes, text)
+        print(f"{links:>6} {chained * 1000:>11.3f} {single * 1000:>15.3f} {chained / single:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from block_markdown import markdown_to_html_node
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import text_to_textnodes
+from textnode import TextNode
+
+
+class DictTextNode:
+    # The node layout before __slots__: a __dict__ per instance
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+def sample_markdown(paragraphs, seed=7):
+    rng = random.Random(seed)
+    urls = [f"/blog/post-{i}" for i in range(20)]
+    blocks = ["# Memory benchmark"]
+    for i in range(paragraphs):
+        url = rng.choice(urls)
+        blocks.append(
+            f"Paragraph {i} has **bold**, _italic_ and `code` with a [link]({url}) "
+            f"and ![an image](/images/{rng.randrange(5)}.png) in it."
+        )
+        blocks.append(f"- item {i}\n- see [also]({url})")
+    return "\n\n".join(blocks)
+
+
+def count_nodes(node):
+    count = 1
+    for child in node.children or ():
+        count += count_nodes(child)
+    return count
+
+
+def copy_as_dict_nodes(node):
+    # Rebuild the same tree with the old layout, fresh props dict per node
+    props = dict(node.props) if node.props is not None else None
+    if node.children is None:
+        return DictHTMLNode(node.tag, node.value, None, props)
+    return DictHTMLNode(node.tag, None, [copy_as_dict_nodes(c) for c in node.children], props)
+
+
+def copy_as_slot_nodes(node):
+    if node.children is None:
+        return LeafNode(node.tag, node.value, node.props)
+    return ParentNode(node.tag, [copy_as_slot_nodes(c) for c in node.children], node.props)
+
+
+def measure(build):
+    # Only the node objects and props are new allocations; the strings they
+    # point at already exist, so both layouts are measured on equal terms
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return result, size
+
+
+def main():
+    markdown = sample_markdown(5000)
+    tree = markdown_to_html_node(markdown)
+    nodes = count_nodes(tree)
+
+    _, dict_bytes = measure(lambda: copy_as_dict_nodes(tree))
+    _, slot_bytes = measure(lambda: copy_as_slot_nodes(tree))
+    print(f"HTML tree: {nodes} nodes")
+    print(f"  __dict__ nodes, fresh props: {dict_bytes / nodes:7.1f} bytes/node")
+    print(f"  __slots__ nodes, shared props: {slot_bytes / nodes:7.1f} bytes/node")
+
+    text_nodes = text_to_textnodes(markdown.replace("\n", " "))
+    _, dict_bytes = measure(
+        lambda: [DictTextNode(n.text, n.text_type, n.url) for n in text_nodes]
+    )
+    _, slot_bytes = measure(lambda: [TextNode(n.text, n.text_type, n.url) for n in text_nodes])
+    count = len(text_nodes)
+    print(f"TextNodes: {count} nodes")
+    print(f"  __dict__: {dict_bytes / count:7.1f} bytes/node")
+    print(f"  __slots__: {slot_bytes / count:7.1f} bytes/node")
+
+
+if __name__ == "__main__":
+    main()
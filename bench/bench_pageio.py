@@ -0,0 +1,92 @@
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench.corpus import generate_document
+from bench.suite import best_of
+from main import render_pages
+from pageio import read_text, write_atomic
+
+# Reading one large source, and a serial build of many pages with the
+# writer threads against writing each page before parsing the next. The
+# slow-disk rows add a fixed delay to every rename, standing in for a
+# network filesystem or a busy disk.
+
+
+class SyncWriter:
+    # PageWriter's interface, writing in the calling thread
+    def __init__(self, *args):
+        pass
+
+    def submit(self, dest_path, chunks):
+        write_atomic(dest_path, lambda f: f.writelines(chunks))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def read_plain(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+def make_site(root, pages, blocks):
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, "w") as f:
+        f.write("<html><title>{{ Title }}</title><body>{{ Content }}</body></html>")
+    jobs = []
+    for i in range(pages):
+        from_path = os.path.join(root, "content", f"section{i % 10}", f"page{i}.md")
+        os.makedirs(os.path.dirname(from_path), exist_ok=True)
+        with open(from_path, "w") as f:
+            f.write(f"# Page {i}\n\n" + generate_document(blocks, seed=i))
+        jobs.append((from_path, os.path.join(root, "docs", f"section{i % 10}", f"page{i}.html")))
+    return template_path, jobs
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        print(f"{'read':<24} {'open().read()':>14} {'read_text':>10}")
+        for megabytes in (1, 8, 32):
+            path = os.path.join(root, f"{megabytes}.md")
+            with open(path, "w") as f:
+                text = generate_document(2000, seed=megabytes)
+                f.write(text * (megabytes * 1024 * 1024 // len(text) + 1))
+            plain = best_of(lambda: read_plain(path), 5)
+            mapped = best_of(lambda: read_text(path), 5)
+            print(f"{f'{megabytes} MB source':<24} {plain * 1000:>12.1f}ms {mapped * 1000:>8.1f}ms")
+
+        template_path, pages = make_site(root, 400, 40)
+        real_replace = os.replace
+
+        def slow_replace(src, dst):
+            time.sleep(0.002)
+            real_replace(src, dst)
+
+        print(f"\n{'400 pages, serial':<24} {'sync writes':>14} {'writer':>10}")
+        for name, latency in (("local disk", None), ("slow disk, 2ms/write", slow_replace)):
+            def build():
+                with redirect_stdout(StringIO()):
+                    render_pages(pages, template_path, "/")
+
+            # Alternate the two so drift in machine speed hits both alike
+            sync = threaded = float("inf")
+            with mock.patch("os.replace", latency or real_replace):
+                for _ in range(5):
+                    with mock.patch("main.PageWriter", SyncWriter):
+                        sync = min(sync, best_of(build, 1))
+                    threaded = min(threaded, best_of(build, 1))
+            print(f"{name:<24} {sync * 1000:>12.1f}ms {threaded * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
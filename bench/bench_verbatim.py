@@ -0,0 +1,65 @@
+import os
+import sys
+import tracemalloc
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench.suite import best_of
+from block_markdown import markdown_to_html_node
+from htmlnode import LeafNode
+
+# A generated listing of a few megabytes, parsed and then serialized both
+# to a string (the cached path) and straight to a file (the streamed path).
+# "joined" is how code blocks were built before: the lines joined into one
+# string when the fence closed, escaped and formatted as a whole.
+
+
+def listing(lines):
+    body = "\n".join(f"    if (x{i} < limit && !done) {{ total += x{i}; }}" for i in range(lines))
+    return f"# Generated\n\n```c\n{body}\n```\n\nThe end."
+
+
+def joined_code(tag, lines, props=None):
+    return LeafNode(tag, "\n".join(lines) + "\n" if lines else "", props)
+
+
+def parse_and_write(markdown, sink):
+    markdown_to_html_node(markdown).write_to(sink)
+
+
+def peak_bytes(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    repeat = 5
+    print(f"{'lines':>8} {'MB':>5} {'':>10} {'joined':>10} {'verbatim':>10}")
+    with open(os.devnull, "w") as sink:
+        for lines in (10000, 100000):
+            markdown = listing(lines)
+            runs = {
+                "to_html": lambda: markdown_to_html_node(markdown).to_html(),
+                "write_to": lambda: parse_and_write(markdown, sink),
+            }
+            for name, run in runs.items():
+                with mock.patch("block_markdown.VerbatimNode", joined_code):
+                    joined = best_of(run, repeat)
+                verbatim = best_of(run, repeat)
+                print(
+                    f"{lines:>8} {len(markdown) / 1e6:>5.1f} {name:>10} "
+                    f"{joined * 1000:>8.1f}ms {verbatim * 1000:>8.1f}ms"
+                )
+            run = runs["write_to"]
+            with mock.patch("block_markdown.VerbatimNode", joined_code):
+                joined = peak_bytes(run)
+            verbatim = peak_bytes(run)
+            print(f"{'':>8} {'':>5} {'peak':>10} {joined / 1e6:>8.1f}MB {verbatim / 1e6:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
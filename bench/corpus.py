@@ -0,0 +1,119 @@
+import os
+import random
+
+# Relative weights of each block kind, and of each inline span kind within
+# prose. Pass a dict with different weights to shift the mix.
+DEFAULT_BLOCK_MIX = {
+    "heading": 2,
+    "paragraph": 8,
+    "code": 1,
+    "quote": 1,
+    "unordered_list": 1,
+    "ordered_list": 1,
+}
+DEFAULT_INLINE_MIX = {
+    "plain": 12,
+    "bold": 1,
+    "italic": 1,
+    "code": 1,
+    "link": 1,
+    "image": 0.5,
+}
+
+_WORDS = (
+    "the quick brown fox jumps over lazy dog ring shire elves road mountain river "
+    "hobbit wizard king sword tower forest stone light shadow north west"
+).split()
+
+
+class CorpusGenerator:
+    # Reproducible markdown: the same seed and mix always produce the same text
+    def __init__(self, seed=0, block_mix=None, inline_mix=None):
+        self.rng = random.Random(seed)
+        block_mix = block_mix or DEFAULT_BLOCK_MIX
+        inline_mix = inline_mix or DEFAULT_INLINE_MIX
+        self._block_kinds = list(block_mix)
+        self._block_weights = list(block_mix.values())
+        self._inline_kinds = list(inline_mix)
+        self._inline_weights = list(inline_mix.values())
+        self._blocks = {
+            "heading": self.heading,
+            "paragraph": self.paragraph,
+            "code": self.code,
+            "quote": self.quote,
+            "unordered_list": self.unordered_list,
+            "ordered_list": self.ordered_list,
+        }
+
+    def words(self, count):
+        return " ".join(self.rng.choice(_WORDS) for _ in range(count))
+
+    def span(self):
+        kind = self.rng.choices(self._inline_kinds, self._inline_weights)[0]
+        text = self.words(self.rng.randint(1, 3))
+        if kind == "bold":
+            return f"**{text}**"
+        if kind == "italic":
+            return f"_{text}_"
+        if kind == "code":
+            return f"`{text}`"
+        if kind == "link":
+            return f"[{text}](/blog/{self.rng.choice(_WORDS)})"
+        if kind == "image":
+            return f"![{text}](/images/{self.rng.randrange(50)}.png)"
+        return text
+
+    def prose(self, spans):
+        return " ".join(self.span() for _ in range(spans))
+
+    def heading(self):
+        return f"{'#' * self.rng.randint(2, 6)} {self.prose(2)}"
+
+    def paragraph(self):
+        return "\n".join(self.prose(self.rng.randint(4, 12)) for _ in range(self.rng.randint(1, 4)))
+
+    def code(self):
+        lines = (f"    {self.words(self.rng.randint(2, 8))}" for _ in range(self.rng.randint(2, 20)))
+        return "```\n" + "\n".join(lines) + "\n```"
+
+    def quote(self):
+        return "\n".join(f"> {self.prose(self.rng.randint(2, 6))}" for _ in range(self.rng.randint(1, 5)))
+
+    def unordered_list(self):
+        return "\n".join(f"- {self.prose(self.rng.randint(1, 5))}" for _ in range(self.rng.randint(2, 10)))
+
+    def ordered_list(self):
+        return "\n".join(
+            f"{i + 1}. {self.prose(self.rng.randint(1, 5))}" for i in range(self.rng.randint(2, 10))
+        )
+
+    def block(self):
+        kind = self.rng.choices(self._block_kinds, self._block_weights)[0]
+        return self._blocks[kind]()
+
+    def document(self, blocks, title="Benchmark document"):
+        return "\n\n".join([f"# {title}"] + [self.block() for _ in range(blocks)])
+
+
+def generate_document(blocks, seed=0, block_mix=None, inline_mix=None):
+    return CorpusGenerator(seed, block_mix, inline_mix).document(blocks)
+
+
+def generate_paragraph(spans, seed=0, inline_mix=None):
+    return CorpusGenerator(seed, inline_mix=inline_mix).prose(spans)
+
+
+def write_site(directory, pages, blocks_per_page=12, seed=0, block_mix=None, inline_mix=None,
+               per_dir=100):
+    # pages small markdown files, per_dir to a directory, like a large blog.
+    # Returns the paths written.
+    generator = CorpusGenerator(seed, block_mix, inline_mix)
+    paths = []
+    for i in range(pages):
+        dir_path = os.path.join(directory, f"section-{i // per_dir:04d}")
+        os.makedirs(dir_path, exist_ok=True)
+        path = os.path.join(dir_path, f"page-{i:06d}.md")
+        with open(path, "w") as f:
+            f.write(generator.document(blocks_per_page, title=f"Page {i}"))
+        paths.append(path)
+    return paths
@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench.corpus import CorpusGenerator
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "main.py")
+
+
+def documents(count, seed=9):
+    # Mostly comment-sized snippets with the occasional long document
+    generator = CorpusGenerator(seed)
+    docs = []
+    for _ in range(count):
+        blocks = 200 if generator.rng.random() < 0.02 else generator.rng.randint(1, 4)
+        docs.append(generator.document(blocks).encode())
+    return docs
+
+
+async def client(host, port, docs, stop_at, deadline_ms, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    i = 0
+    try:
+        while time.perf_counter() < stop_at:
+            body = docs[i % len(docs)]
+            i += 1
+            head = f"POST /render HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+            if deadline_ms:
+                head += f"X-Deadline-Ms: {deadline_ms}\r\n"
+            start = time.perf_counter()
+            writer.write(head.encode() + b"\r\n" + body)
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line == b"\r\n":
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            status = int(status_line.split()[1])
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def run_load(host, port, concurrency, duration, deadline_ms):
+    docs = documents(500)
+    latencies = []
+    statuses = {}
+    stop_at = time.perf_counter() + duration
+    await asyncio.gather(*(
+        client(host, port, docs[i:] + docs[:i], stop_at, deadline_ms, latencies, statuses)
+        for i in range(concurrency)
+    ))
+    return sorted(latencies), statuses
+
+
+def start_server(jobs):
+    server = subprocess.Popen(
+        [sys.executable, MAIN_PATH, "render-server", "--port", "0", "--jobs", str(jobs)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    match = re.search(r":(\d+)/render", server.stdout.readline())
+    if match is None:
+        server.kill()
+        raise SystemExit("render server did not start")
+    return server, int(match.group(1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure render server latency under load")
+    parser.add_argument("--url", help="host:port of a running server; default starts one")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="workers for the started server")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("-d", "--duration", type=float, default=5.0, help="seconds per level")
+    parser.add_argument("--deadline-ms", type=int, default=0)
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        host, _, port = args.url.rpartition(":")
+        port = int(port)
+    else:
+        server, port = start_server(args.jobs)
+        host = "127.0.0.1"
+    try:
+        print(f"{'clients':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}  statuses")
+        for concurrency in args.concurrency:
+            latencies, statuses = asyncio.run(
+                run_load(host, port, concurrency, args.duration, args.deadline_ms)
+            )
+            print(
+                f"{concurrency:>7} {len(latencies) / args.duration:>9.0f} "
+                f"{percentile(latencies, 0.50) * 1000:>9.2f} "
+                f"{percentile(latencies, 0.99) * 1000:>9.2f} "
+                f"{(latencies[-1] if latencies else 0) * 1000:>9.2f}  "
+                f"{dict(sorted(statuses.items()))}"
+            )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
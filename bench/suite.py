@@ -0,0 +1,206 @@
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import re
+import shutil
+import statistics
+import tempfile
+import time
+from unittest import mock
+
+from bench.corpus import generate_document, generate_paragraph, write_site
+from block_markdown import markdown_to_html_node
+from htmlnode import LeafNode
+from inline_markdown import text_to_textnodes
+from main import generate_pages_recursive
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "template.html")
+DEFAULT_TOLERANCE = 0.25
+# Shortest stretch a benchmark is timed over, see relative_time
+MIN_SAMPLE = 0.05
+
+# How big each corpus is at each scale: one huge document, one long
+# paragraph of inline spans, and a site of many small pages
+SCALES = {
+    "small": {"document_blocks": 2000, "paragraph_spans": 5000, "pages": 200},
+    "medium": {"document_blocks": 20000, "paragraph_spans": 50000, "pages": 2000},
+    "large": {"document_blocks": 200000, "paragraph_spans": 500000, "pages": 100000},
+}
+
+
+def timed(func):
+    # Like timeit, keep the collector out of the timings: when it runs
+    # depends on everything allocated before, not on the code under test
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def best_of(func, repeat):
+    return min(timed(func) for _ in range(repeat))
+
+
+class _Token:
+    __slots__ = ("kind", "text", "children")
+
+    def __init__(self, kind, text, children=None):
+        self.kind = kind
+        self.text = text
+        self.children = children
+
+
+_CALIBRATION_TEXT = " ".join(f"word{i % 97} **b{i % 13}** [l](/p/{i % 31})" for i in range(2000))
+_CALIBRATION_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def calibration_work():
+    # A fixed workload shaped like the generator's own: tokenize text with a
+    # regex, build a tree of small slotted objects, then format and join it
+    # back into a string. It uses nothing from src/, so a regression there
+    # cannot hide in it, but it allocates and frees the way parsing and
+    # rendering do, and a machine that is slow at one is slow at the other.
+    nodes = []
+    for match in _CALIBRATION_TOKEN.finditer(_CALIBRATION_TEXT):
+        text = match.group()
+        children = [_Token("t", text)] if len(text) > 3 else None
+        nodes.append(_Token("w" if text[0].isalnum() else "p", text, children))
+    parts = []
+    for node in nodes:
+        if node.children:
+            parts.append(f"<{node.kind}>{node.children[0].text}</{node.kind}>")
+        else:
+            parts.append(node.text)
+    return "".join(parts)
+
+
+def relative_time(func, repeat):
+    # Returns (best seconds, func's time relative to calibration_work). Each
+    # run of func comes straight after a run of the calibration workload,
+    # so load that comes and goes on the machine slows both halves of a
+    # pair alike, and the median pair is what counts. Both halves are run
+    # in loops of at least MIN_SAMPLE seconds, as timeit's autorange does,
+    # so a short benchmark isn't thrown off by a single pause. Baselines
+    # store the relative time, which holds from one run or machine to the
+    # next far better than seconds do.
+    func_loops = _loops(func)
+    calibration_loops = _loops(calibration_work)
+    times = []
+    ratios = []
+    for _ in range(repeat):
+        calibration = timed(lambda: _run(calibration_work, calibration_loops)) / calibration_loops
+        elapsed = timed(lambda: _run(func, func_loops)) / func_loops
+        times.append(elapsed)
+        ratios.append(elapsed / calibration)
+    return min(times), statistics.median(ratios)
+
+
+def _loops(func):
+    # How many calls of func make a sample of at least MIN_SAMPLE seconds
+    return max(1, math.ceil(MIN_SAMPLE / timed(func)))
+
+
+def _run(func, loops):
+    for _ in range(loops):
+        func()
+
+
+def run_suite(scale="small", repeat=5, only=None):
+    # Time each layer of the pipeline, from block parsing up to a whole
+    # site build. Returns {benchmark name: (best seconds, relative time)},
+    # see relative_time.
+    sizes = SCALES[scale]
+    document = generate_document(sizes["document_blocks"], seed=1)
+    paragraph = generate_paragraph(sizes["paragraph_spans"], seed=2)
+    tree = markdown_to_html_node(document)
+
+    benchmarks = {
+        "block_parse": lambda: block_parse(document),
+        "text_to_textnodes": lambda: text_to_textnodes(paragraph),
+        "markdown_to_html_node": lambda: markdown_to_html_node(document),
+        "to_html": lambda: tree.to_html(),
+    }
+    results = {}
+    for name, func in benchmarks.items():
+        if only is None or name in only:
+            results[name] = relative_time(func, repeat)
+    if only is None or "generate_pages_recursive" in only:
+        results["generate_pages_recursive"] = time_site(sizes["pages"], repeat)
+    return results
+
+
+def plain_children(text):
+    return [LeafNode(None, text)]
+
+
+def block_parse(document):
+    # The block layer alone: the line parser with inline parsing stubbed out
+    with mock.patch("block_markdown.text_to_children", plain_children):
+        return markdown_to_html_node(document)
+
+
+def time_site(pages, repeat):
+    work_dir = tempfile.mkdtemp(prefix="bench-site-")
+    try:
+        content_dir = os.path.join(work_dir, "content")
+        dest_dir = os.path.join(work_dir, "docs")
+        write_site(content_dir, pages, seed=3)
+
+        def build():
+            # The per-page log would dominate a build of small pages
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content_dir, TEMPLATE_PATH, dest_dir, "/")
+        return relative_time(build, repeat)
+    finally:
+        shutil.rmtree(work_dir)
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_baseline(baseline, path=BASELINE_PATH):
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results, recorded, tolerance=DEFAULT_TOLERANCE):
+    # Returns one (name, seconds, expected seconds or None, regressed) row per
+    # result. A benchmark regresses when its time relative to the
+    # calibration workload grows past the baseline's by more than tolerance;
+    # the expected seconds are the baseline's relative time at this run's
+    # speed.
+    rows = []
+    baseline_results = recorded.get("relative", {}) if recorded else {}
+    for name, (seconds, relative) in results.items():
+        expected = baseline_results.get(name)
+        if expected is None:
+            rows.append((name, seconds, None, False))
+            continue
+        regressed = relative > expected * (1 + tolerance)
+        rows.append((name, seconds, seconds * expected / relative, regressed))
+    return rows
+
+
+def format_rows(rows):
+    lines = [f"{'benchmark':<26} {'seconds':>9} {'baseline':>9} {'change':>8}"]
+    for name, seconds, expected, regressed in rows:
+        if expected is None:
+            lines.append(f"{name:<26} {seconds:>9.4f} {'-':>9} {'new':>8}")
+            continue
+        change = (seconds / expected - 1) * 100
+        flag = "  REGRESSION" if regressed else ""
+        lines.append(f"{name:<26} {seconds:>9.4f} {expected:>9.4f} {change:>+7.1f}%{flag}")
+    return "\n".join(lines)
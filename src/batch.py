@@ -0,0 +1,61 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from block_markdown import inline_memo_stats, markdown_to_html_node, set_inline_memo
+
+# Below this many distinct documents, starting worker processes costs more
+# than it saves
+POOL_THRESHOLD = 2000
+# Documents sent to a worker per task, so small snippets don't each pay for
+# a round trip
+CHUNK_SIZE = 256
+
+
+def render(markdown, url_prefix=""):
+    return markdown_to_html_node(markdown).to_html(url_prefix)
+
+
+def render_many(documents, url_prefix="", jobs=1, threshold=POOL_THRESHOLD, executor=None):
+    # Render an iterable of markdown strings to a list of HTML strings, in
+    # order. Identical documents are rendered once. With jobs > 1 (0 means
+    # one per CPU) or an executor, batches of at least threshold distinct
+    # documents are split across worker processes; pass a long-lived
+    # executor to avoid starting a new pool per call.
+    documents = list(documents)
+    unique = list(dict.fromkeys(documents))
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if len(unique) >= threshold and (executor is not None or jobs > 1):
+        html = _render_pooled(unique, url_prefix, jobs, executor)
+    else:
+        html = [render(markdown, url_prefix) for markdown in unique]
+    if len(unique) == len(documents):
+        return html
+    rendered = dict(zip(unique, html))
+    return [rendered[markdown] for markdown in documents]
+
+
+def make_executor(jobs=0, mp_context=None):
+    # A worker pool for render_many that shares the parent's inline memo size
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    stats = inline_memo_stats()
+    memo_size = 0 if stats is None else stats["maxsize"]
+    return ProcessPoolExecutor(
+        max_workers=jobs, mp_context=mp_context, initializer=set_inline_memo, initargs=(memo_size,)
+    )
+
+
+def _render_pooled(documents, url_prefix, jobs, executor):
+    chunks = [documents[i:i + CHUNK_SIZE] for i in range(0, len(documents), CHUNK_SIZE)]
+    prefixes = [url_prefix] * len(chunks)
+    if executor is not None:
+        results = executor.map(_render_chunk, chunks, prefixes)
+        return [html for chunk in results for html in chunk]
+    with make_executor(jobs) as pool:
+        results = pool.map(_render_chunk, chunks, prefixes)
+        return [html for chunk in results for html in chunk]
+
+
+def _render_chunk(documents, url_prefix):
+    return [render(markdown, url_prefix) for markdown in documents]
@@ -2,7 +2,14 @@ import re
 from enum import Enum
 from htmlnode import *
 from inline_markdown import text_to_textnodes
-from textnode import text_node_to_html_node, TextNode, TextType
+from memo import LRUMemo
+from profiler import phase
+from textnode import text_node_to_html_node
+
+# Bump whenever the HTML produced for the same markdown changes, so cached
+# renders from older versions are never reused and incremental builds (and
+# the dev server's first build) render every page again
+PARSER_VERSION = 4
 
 class BlockType(Enum):
     HEADING = "heading"
@@ -12,84 +19,65 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
     PARAGRAPH = "paragraph"
 
-def block_to_block_type(block):
-    # Check for each block type according to the rules
-    # For example, to check if it's a heading:
-        # Additional checks to confirm it's a valid heading
-    if re.match(r'^#{1,6} ', block):
-        return BlockType.HEADING
-    
-    lines = block.strip().splitlines()
-    if len(lines) >= 2 and lines[0].startswith("```") and lines[-1] == "```":
-        return BlockType.CODE
-    
-    if all(re.match(r'^>', line) for line in block.splitlines()):
-        return BlockType.QUOTE
-    
-    if all(line.startswith("- ") for line in block.splitlines()):
-        return BlockType.UNORDERED_LIST
-    
-    lines = block.splitlines()
-    is_ordered = True
-    expected_number = 1
-    
-    for line in lines:
-        expected_prefix = f"{expected_number}. "
-        if not line.startswith(expected_prefix):
-            is_ordered = False
-            break
-        expected_number += 1
-    
-    if is_ordered and lines:  # Make sure there's at least one line
-        return BlockType.ORDERED_LIST
-    
-    # If none of the specific types match, it's a paragraph
-    return BlockType.PARAGRAPH
-        
-
-def markdown_to_blocks(markdown):
-    split_blocks = markdown.split("\n\n")
-    cleaned_blocks = []
-    
-    for block in split_blocks:
-        # Process each line in the block to remove leading/trailing spaces
-        lines = block.strip().split("\n")
-        cleaned_lines = [line.strip() for line in lines]
-        cleaned_block = "\n".join(cleaned_lines)
-        
-        if cleaned_block:
-            cleaned_blocks.append(cleaned_block)
-    
-    return cleaned_blocks
-
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
+def markdown_to_html_node(markdown, metadata=None):
+    lines = markdown.split("\n")
+    if lines[-1] == "":
+        # A final newline ends the last line rather than starting another,
+        # as when the same text is read from a file
+        lines.pop()
+    children = list(iter_block_nodes(lines, metadata))
     return ParentNode("div", children, None)
 
+def iter_block_nodes(lines, metadata=None):
+    # Accepts any iterable of lines, such as an open file, and yields the
+    # node of each top-level block as soon as a later line closes it.
+    # metadata, a metadata.DocumentMetadata, is filled in block by block as
+    # the nodes are built.
+    parser = _BlockParser()
+    done = parser.done
+    lines = iter(lines)
+    while True:
+        with phase("blocks"):
+            for line in lines:
+                parser.feed(line)
+                if done:
+                    break
+            else:
+                parser.finish()
+        if not done:
+            return
+        for block_type, source, node in done:
+            if metadata is not None:
+                with phase("metadata"):
+                    metadata.add_block(block_type, source, node)
+            yield node
+        done.clear()
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
-    if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
-    if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
-    if block_type == BlockType.CODE:
-        return code_to_html_node(block)
-    if block_type == BlockType.ORDERED_LIST:
-        return olist_to_html_node(block)
-    if block_type == BlockType.UNORDERED_LIST:
-        return ulist_to_html_node(block)
-    if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
-    raise ValueError("invalid block type")
 
+_inline_memo = None
+
+def set_inline_memo(maxsize):
+    # Memoize inline rendering on the exact text, for sites that repeat the
+    # same list items and paragraphs on every page; 0 turns it off
+    global _inline_memo
+    _inline_memo = LRUMemo(_render_inline, maxsize) if maxsize else None
+    return _inline_memo
+
+def inline_memo_stats():
+    return None if _inline_memo is None else _inline_memo.stats()
 
 def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
+    if _inline_memo is not None:
+        # Nodes are never mutated after parsing, so trees may share them
+        return list(_inline_memo(text))
+    return _text_to_children(text)
+
+def _render_inline(text):
+    return tuple(_text_to_children(text))
+
+def _text_to_children(text):
+    with phase("inline"):
+        text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
         html_node = text_node_to_html_node(text_node)
@@ -97,72 +85,327 @@ def text_to_children(text):
     return children
 
 
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
-    paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
-    return ParentNode("p", children)
+# The line parser keeps a stack of open containers: the document, block
+# quotes, lists and list items. Each line first walks the stack to find the
+# containers it continues (a quote needs its ">", an item needs its
+# indentation), may then open new containers, and whatever is left of it
+# goes to the innermost container's open leaf block: a paragraph or a code
+# block. Every line is looked at once, and only open blocks are held.
 
+_SPACES_RE = re.compile(r" *")
+_ATX_RE = re.compile(r"(#{1,6})[ \t]+(\S.*)")
+_FENCE_RE = re.compile(r"(`{3,}|~{3,})(.*)")
+_LIST_MARKER_RE = re.compile(r"(?:[-+*]|(\d{1,9})[.)])( *)")
+_LIST_MARKER_CHARS = frozenset("-+*0123456789")
+# First characters of every line that could open or close a block
+_BLOCK_START_CHARS = _LIST_MARKER_CHARS | frozenset(" >#`~")
+
+
+class _Container:
+    __slots__ = ("kind", "children", "leaf", "indent", "marker", "start", "list", "pending_blank", "loose")
+
+    def __init__(self, kind, indent=0, marker=None, start=None, list=None):
+        self.kind = kind  # "document", "quote", "list" or "item"
+        self.children = []  # finished nodes; a list's are its items' children
+        self.leaf = None  # the open paragraph or code block, innermost container only
+        self.indent = indent  # an item's content column
+        self.marker = marker  # a list's bullet or ordered delimiter
+        self.start = start  # an ordered list's first number
+        self.list = list  # an item's list
+        self.pending_blank = False  # a blank line since this container's last content
+        self.loose = False
 
-def heading_to_html_node(block):
-    level = 0
-    for char in block:
-        if char == "#":
-            level += 1
-        else:
-            break
-    if level + 1 >= len(block):
-        raise ValueError(f"invalid heading level: {level}")
-    text = block[level + 1 :]
-    children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
 
+class _Leaf:
+    __slots__ = ("kind", "lines", "indent", "fence", "info", "blanks")
 
-def code_to_html_node(block):
-    if not block.startswith("```") or not block.endswith("```"):
-        raise ValueError("invalid code block")
-    text = block[4:-3]
-    raw_text_node = TextNode(text, TextType.TEXT)
-    child = text_node_to_html_node(raw_text_node)
-    code = ParentNode("code", [child])
-    return ParentNode("pre", [code])
+    def __init__(self, kind, lines, indent=0, fence=None, info=""):
+        self.kind = kind  # "paragraph", "fence" or "indented"
+        self.lines = lines
+        self.indent = indent  # a fence's own indentation, removed from its lines
+        self.fence = fence
+        self.info = info
+        self.blanks = []  # blank lines inside indented code, kept if more code follows
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
-    html_items = []
-    for item in items:
-        text = item[3:]
-        children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
-    return ParentNode("ol", html_items)
+class _BlockParser:
+    def __init__(self):
+        self.document = _Container("document")
+        self.stack = [self.document]
+        # Closed top-level blocks as (BlockType, source, node); the source is
+        # only kept for headings
+        self.done = []
+        self.pending_blank = False
 
+    def feed(self, line):
+        line = line.rstrip("\r\n")
+        stack = self.stack
+        depth = len(stack)
+        leaf = stack[-1].leaf
+        in_fence = leaf is not None and leaf.kind == "fence"
+        if in_fence and depth == 1:
+            # Top-level fence content has no container markers to match, so
+            # most of its lines are taken as they are
+            text = line.lstrip(" ")
+            indent = len(line) - len(text)
+            if indent > 3 or not text.startswith(leaf.fence) or text.rstrip().strip(leaf.fence[0]):
+                leaf.lines.append(line[min(indent, leaf.indent):])
+                return
+        if depth == 1 and line and line[0] not in _BLOCK_START_CHARS and "\t" not in line:
+            # With no containers open, a line that cannot start a block is
+            # paragraph text
+            if leaf is None:
+                stack[0].leaf = _Leaf("paragraph", [line.rstrip()])
+                self._content()
+                return
+            if leaf.kind == "paragraph":
+                leaf.lines.append(line.rstrip())
+                self._content()
+                return
+        if "\t" in line and not in_fence:
+            line = line.expandtabs(4)
+        end = len(line)
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
-    html_items = []
-    for item in items:
-        text = item[2:]
-        children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
-    return ParentNode("ul", html_items)
+        # Which open containers does this line continue?
+        pos = 0
+        matched = 1
+        while matched < depth:
+            container = stack[matched]
+            if container.kind == "quote":
+                indent = _SPACES_RE.match(line, pos).end() - pos
+                if indent > 3 or not line.startswith(">", pos + indent):
+                    break
+                pos += indent + 1
+                if line.startswith(" ", pos):
+                    pos += 1
+            elif container.kind == "item":
+                indent = _SPACES_RE.match(line, pos).end() - pos
+                if pos + indent == end:
+                    if not container.children and container.leaf is None:
+                        break  # an item can start with at most one blank line
+                    pos = end
+                elif indent >= container.indent:
+                    pos += container.indent
+                else:
+                    break
+            matched += 1
 
+        if in_fence and matched == depth:
+            # Fence content is kept exactly, less the fence's own indentation
+            indent = _SPACES_RE.match(line, pos).end() - pos
+            rest = line[pos + indent:].rstrip()
+            if (indent <= 3 and rest.startswith(leaf.fence) and not rest.strip(leaf.fence[0])):
+                self._close_leaf(stack[-1])
+            else:
+                leaf.lines.append(line[pos + min(indent, leaf.indent):])
+            return
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
-    new_lines = []
-    for line in lines:
-        if not line.startswith(">"):
-            raise ValueError("invalid quote block")
-        stripped = line.lstrip(">").strip()
-        if stripped:  # Only add non-empty lines
-            new_lines.append(stripped)
-    content = " ".join(new_lines)  # Join with a single space
-    children = text_to_children(content)
-    return ParentNode("blockquote", children)
+        # Does it open new quotes or list items?
+        indent = _SPACES_RE.match(line, pos).end() - pos
+        blank = pos + indent == end
+        paragraph = leaf if leaf is not None and leaf.kind == "paragraph" else None
+        opened = False
+        while not blank and indent < 4:
+            start = pos + indent
+            char = line[start]
+            if char == ">":
+                self._close_to(matched)
+                self._open(_Container("quote"))
+                pos = start + 1
+                if line.startswith(" ", pos):
+                    pos += 1
+            elif char in _LIST_MARKER_CHARS:
+                match = _LIST_MARKER_RE.match(line, start)
+                if match is None:
+                    break
+                digits, spaces = match.group(1), match.end(2) - match.start(2)
+                if spaces == 0 and match.end() < end:
+                    break  # "-x" or "1.5" is text
+                empty = match.end() == end
+                if paragraph is not None and matched == depth and not opened and (
+                    empty or (digits is not None and digits != "1")
+                ):
+                    break  # only these list items may interrupt a paragraph
+                marker_width = match.start(2) - start
+                padding = 1 if empty or spaces > 4 else spaces
+                self._close_to(matched)
+                marker = line[match.start(2) - 1]
+                parent = self.stack[-1]
+                if parent.kind == "list" and parent.marker == marker:
+                    if parent.pending_blank:
+                        parent.loose = True
+                    list_container = parent
+                else:
+                    start_number = int(digits) if digits is not None else None
+                    list_container = _Container("list", marker=marker, start=start_number)
+                    self._open(list_container)
+                self._open(_Container("item", indent + marker_width + padding, list=list_container))
+                pos = min(start + marker_width + padding, end)
+            else:
+                break
+            opened = True
+            matched = len(self.stack)
+            indent = _SPACES_RE.match(line, pos).end() - pos
+            blank = pos + indent == end
 
+        if blank:
+            if matched < len(self.stack):
+                self._close_to(matched)
+            container = self.stack[-1]
+            leaf = container.leaf
+            if leaf is not None:
+                if leaf.kind == "paragraph":
+                    self._close_leaf(container)
+                elif leaf.kind == "indented":
+                    leaf.blanks.append(line[pos + 4:])
+            if not opened:
+                for container in self.stack:
+                    container.pending_blank = True
+                self.pending_blank = True
+            return
 
+        text = line[pos + indent:]
+        starts_leaf = indent < 4 and (
+            text[0] == "#" and _ATX_RE.match(text) is not None or _fence(text) is not None
+        )
+        if paragraph is not None and not opened and not starts_leaf:
+            # A paragraph continues across a line that lost its containers'
+            # markers, the "lazy" continuation of a quote or list item
+            paragraph.lines.append(text.rstrip())
+            self._content()
+            return
 
+        if matched < len(self.stack):
+            self._close_to(matched)
+        container = self.stack[-1]
+        if container.kind == "list":
+            self._close_to(len(self.stack) - 1)
+            container = self.stack[-1]
+        leaf = container.leaf
+        if leaf is not None:
+            if leaf.kind == "indented" and indent >= 4:
+                leaf.lines += leaf.blanks
+                leaf.blanks = []
+                leaf.lines.append(line[pos + 4:])
+                self._content()
+                return
+            self._close_leaf(container)
+        self._start_block(container)
+        if indent >= 4:
+            container.leaf = _Leaf("indented", [line[pos + 4:]])
+        elif starts_leaf and text[0] == "#":
+            match = _ATX_RE.match(text)
+            level = len(match.group(1))
+            with phase("build"):
+                node = ParentNode(f"h{level}", text_to_children(match.group(2).rstrip()))
+            self._add(container, BlockType.HEADING, text.rstrip(), node)
+        elif starts_leaf:
+            fence, info = _fence(text)
+            container.leaf = _Leaf("fence", [], indent, fence, info)
+        else:
+            container.leaf = _Leaf("paragraph", [text.rstrip()])
+        self._content()
+
+    def finish(self):
+        self._close_to(1)
+        if self.document.leaf is not None:
+            self._close_leaf(self.document)
+
+    def _content(self):
+        # A non-blank line: the blank lines before it have been accounted for
+        if self.pending_blank:
+            for container in self.stack:
+                container.pending_blank = False
+            self.pending_blank = False
 
+    def _start_block(self, container):
+        # A blank line between two blocks of an item makes its list loose
+        if container.pending_blank and container.kind == "item":
+            container.list.loose = True
+
+    def _open(self, container):
+        stack = self.stack
+        while stack[-1].kind == "list" and container.kind != "item":
+            self._close_to(len(stack) - 1)
+        parent = stack[-1]
+        if parent.leaf is not None:
+            self._close_leaf(parent)
+        self._start_block(parent)
+        stack.append(container)
+
+    def _add(self, container, block_type, source, node):
+        if container is self.document:
+            self.done.append((block_type, source, node))
+        else:
+            container.children.append(node)
 
+    def _close_leaf(self, container):
+        leaf = container.leaf
+        container.leaf = None
+        with phase("build"):
+            if leaf.kind == "paragraph":
+                block_type = BlockType.PARAGRAPH
+                node = ParentNode("p", text_to_children(" ".join(leaf.lines)))
+            else:
+                block_type = BlockType.CODE
+                props = {"class": f"language-{leaf.info}"} if leaf.info else None
+                # The lines are not joined here; the node writes them out
+                node = ParentNode("pre", [VerbatimNode("code", leaf.lines, props)])
+        self._add(container, block_type, None, node)
 
+    def _close_to(self, depth):
+        # Close every container above depth, innermost first
+        stack = self.stack
+        while len(stack) > depth:
+            container = stack.pop()
+            if container.leaf is not None:
+                self._close_leaf(container)
+            parent = stack[-1]
+            if container.kind == "item":
+                parent.children.append(container.children)
+                continue
+            with phase("build"):
+                if container.kind == "quote":
+                    children = container.children
+                    # A quote of a single paragraph keeps its text inline
+                    if len(children) == 1 and children[0].tag == "p":
+                        children = children[0].children
+                    block_type = BlockType.QUOTE
+                    node = ParentNode("blockquote", children)
+                else:
+                    items = []
+                    for children in container.children:
+                        if not container.loose:
+                            children = _unwrap_paragraphs(children)
+                        items.append(ParentNode("li", children))
+                    if container.start is None:
+                        block_type = BlockType.UNORDERED_LIST
+                        node = ParentNode("ul", items)
+                    else:
+                        block_type = BlockType.ORDERED_LIST
+                        props = None if container.start == 1 else {"start": str(container.start)}
+                        node = ParentNode("ol", items, props)
+            self._add(parent, block_type, None, node)
+
+
+def _fence(text):
+    # (fence, language) if text opens a fenced code block
+    match = _FENCE_RE.match(text)
+    if match is None:
+        return None
+    fence, info = match.groups()
+    if fence[0] == "`" and "`" in info:
+        return None
+    words = info.split(None, 1)
+    return fence, words[0] if words else ""
+
+
+def _unwrap_paragraphs(children):
+    # The items of a tight list hold their text without <p>
+    unwrapped = []
+    for child in children:
+        if child.tag == "p":
+            unwrapped.extend(child.children)
+        else:
+            unwrapped.append(child)
+    return unwrapped
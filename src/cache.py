@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+
+from block_markdown import PARSER_VERSION
+from metadata import DocumentMetadata
+from pageio import write_atomic
+
+CACHE_DIR = "./.build/cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Larger sources are streamed instead, which keeps their memory use bounded
+MAX_SOURCE_BYTES = 8 * 1024 * 1024
+
+
+class RenderCache:
+    # Maps a hash of (parser version, url prefix, markdown) to the page's
+    # metadata and rendered content HTML. Each entry is one file; its mtime is bumped on
+    # every hit, so pruning by oldest mtime evicts the least recently used.
+    def __init__(self, directory=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, markdown, prefix=""):
+        digest = hashlib.sha256(f"{PARSER_VERSION}\0{prefix}\0".encode())
+        digest.update(markdown.encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+            metadata = DocumentMetadata.from_dict(entry["metadata"])
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return metadata, entry["html"]
+
+    def put(self, key, metadata, html):
+        # Written atomically, so parallel workers never read a partial entry
+        entry = {"metadata": metadata.to_dict(), "html": html}
+        write_atomic(self._path(key), lambda f: json.dump(entry, f))
+
+    def prune(self):
+        # Evict least recently used entries until the cache fits in max_bytes
+        entries = []
+        total = 0
+        if not os.path.isdir(self.directory):
+            return 0
+        for dir_entry in os.scandir(self.directory):
+            if not dir_entry.is_dir():
+                continue
+            for file_entry in os.scandir(dir_entry.path):
+                stat = file_entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, file_entry.path))
+                total += stat.st_size
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
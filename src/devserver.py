@@ -0,0 +1,201 @@
+import argparse
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from cache import RenderCache
+from main import (
+    DIR_PATH_CONTENT, DIR_PATH_DOCS, DIR_PATH_STATIC, TEMPLATE_PATH, build_incremental,
+    discover_pages, generate_page, page_dest, page_template
+)
+from manifest import remove_output
+from sync import copy_file
+from template import load_template
+
+
+def snapshot_tree(root, files):
+    # Record (mtime, size) for every file below root
+    try:
+        entries = os.scandir(root)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir():
+                snapshot_tree(entry.path, files)
+            elif entry.is_file():
+                stat = entry.stat()
+                files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+
+
+class SiteWatcher:
+    # Polls content/, static/ and the templates and brings docs/ up to date by
+    # re-rendering or re-copying only the files that changed. A template or
+    # include change re-renders just the pages whose template reads it.
+    def __init__(self, static_dir, content_dir, template_path, docs_dir, basepath, cache=None):
+        self.static_dir = static_dir
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.docs_dir = docs_dir
+        self.basepath = basepath
+        self.cache = cache
+        self.page_deps = {}
+        self.dep_paths = set()
+        self.files = {}
+        self.files = self.scan()
+
+    def dependencies(self):
+        # Each page's template files, its template first. Pages in one
+        # directory share a template, as in main.scan_sources.
+        section_templates = {}
+        templates = {}
+        page_deps = {}
+        for from_path, _ in discover_pages(self.content_dir, self.docs_dir):
+            dir_path = os.path.dirname(from_path)
+            template_path = section_templates.get(dir_path)
+            if template_path is None:
+                template_path = page_template(from_path, self.content_dir, self.template_path)
+                section_templates[dir_path] = template_path
+            if template_path not in templates:
+                try:
+                    templates[template_path] = load_template(template_path).dependencies
+                except (OSError, ValueError) as e:
+                    print(f"error: {template_path}: {e}")
+                    templates[template_path] = [template_path]
+            page_deps[from_path] = templates[template_path]
+        return page_deps
+
+    def scan(self):
+        files = {}
+        snapshot_tree(self.static_dir, files)
+        snapshot_tree(self.content_dir, files)
+        self.stat_dependencies(files)
+        if self.dependencies_changed(files):
+            self.page_deps = self.dependencies()
+            self.dep_paths = {path for deps in self.page_deps.values() for path in deps}
+            self.stat_dependencies(files)
+        return files
+
+    def stat_dependencies(self, files):
+        for path in self.dep_paths:
+            if path in files:
+                continue
+            try:
+                stat = os.stat(path)
+                files[path] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                pass
+
+    def dependencies_changed(self, files):
+        # Which template a page reads only moves when a file appears in or
+        # goes from content/ (a page or a section template), or when one of
+        # the template files themselves changes
+        content_prefix = os.path.join(self.content_dir, "")
+        if any(path.startswith(content_prefix) for path in files.keys() ^ self.files.keys()):
+            return True
+        return any(files.get(path) != self.files.get(path) for path in self.dep_paths)
+
+    def is_page(self, path):
+        if not path.startswith(os.path.join(self.content_dir, "")):
+            return False
+        rel_path = os.path.relpath(path, self.content_dir)
+        return not any(part.startswith("_") for part in rel_path.split(os.sep))
+
+    def is_static(self, path):
+        return path.startswith(os.path.join(self.static_dir, ""))
+
+    def output_for(self, path):
+        if self.is_page(path):
+            return page_dest(path, self.content_dir, self.docs_dir)
+        return os.path.join(self.docs_dir, os.path.relpath(path, self.static_dir))
+
+    def poll(self):
+        old_deps = self.page_deps
+        files = self.scan()
+        changed = [path for path, stamp in files.items() if self.files.get(path) != stamp]
+        removed = [path for path in self.files if path not in files]
+        self.files = files
+
+        for path in removed:
+            if self.is_page(path) or self.is_static(path):
+                remove_output(self.output_for(path), self.docs_dir)
+                print(f" - {self.output_for(path)}")
+
+        # Pages that changed, plus those whose template files changed before
+        # or after this poll (a removed section template counts too)
+        touched = set(changed).union(removed)
+        pages = [
+            from_path for from_path, deps in self.page_deps.items()
+            if from_path in touched or not touched.isdisjoint(deps)
+            or not touched.isdisjoint(old_deps.get(from_path, ()))
+        ] if touched else []
+
+        for path in changed:
+            if not self.is_static(path):
+                continue
+            dest_path = self.output_for(path)
+            copy_file(path, dest_path)
+            print(f" * {path} -> {dest_path}")
+
+        for from_path in pages:
+            try:
+                generate_page(
+                    from_path, self.page_deps[from_path][0], self.output_for(from_path),
+                    self.basepath, self.cache,
+                )
+            except (OSError, ValueError) as e:
+                # Keep serving while the author fixes a half-written page
+                print(f"error: {from_path}: {e}")
+        return len(changed) + len(removed)
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(docs_dir, port):
+    handler = functools.partial(QuietHandler, directory=docs_dir)
+    return ThreadingHTTPServer(("", port), handler)
+
+
+def serve_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py serve", description="Serve docs/, optionally rebuilding on change"
+    )
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--watch", action="store_true", help="re-render pages as files change")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--interval", type=float, default=0.25, help="seconds between polls")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else RenderCache()
+    build_incremental(
+        DIR_PATH_STATIC, DIR_PATH_CONTENT, TEMPLATE_PATH, DIR_PATH_DOCS, args.basepath, cache=cache
+    )
+
+    httpd = make_server(DIR_PATH_DOCS, args.port)
+    print(f"Serving {DIR_PATH_DOCS} at http://localhost:{httpd.server_address[1]}/")
+    if not args.watch:
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    watcher = SiteWatcher(
+        DIR_PATH_STATIC, DIR_PATH_CONTENT, TEMPLATE_PATH, DIR_PATH_DOCS, args.basepath, cache
+    )
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    print("Watching for changes, Ctrl-C to stop")
+    try:
+        while True:
+            time.sleep(args.interval)
+            watcher.poll()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.shutdown()
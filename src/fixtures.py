@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+# Helpers shared by the tests that build sites on disk
+
+
+def write(path, data, mtime=None):
+    # Create path, and any directories above it, holding data: text, or bytes
+    # written as they are. mtime, in ns, sets its modification time.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb" if isinstance(data, bytes) else "w") as f:
+        f.write(data)
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class SiteTestCase(unittest.TestCase):
+    # A fresh temporary directory per test, with the paths of a site laid
+    # out in it the way main.py expects. Nothing is created; subclasses
+    # write what they need after calling setUp().
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        self.static = os.path.join(self.root, "static")
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest = os.path.join(self.root, ".build", "manifest.json")
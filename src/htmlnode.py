@@ -1,19 +1,78 @@
+import re
+
+# Attributes that hold URLs; root-relative values get the site's basepath
+URL_PROPS = ("href", "src")
+
+# Lines of a VerbatimNode joined into each chunk it writes
+VERBATIM_BATCH_LINES = 1024
+
+# An "&" that does not start a character reference like &copy; or &#8212;
+_BARE_AMP_RE = re.compile(r"&(?!(?:[A-Za-z][A-Za-z0-9]{1,31}|#[0-9]{1,7}|#[xX][0-9A-Fa-f]{1,6});)")
+
+
+# Most strings contain none of the special characters, so each escaper
+# checks for them first and returns its argument untouched. The replace
+# chains measured several times faster than str.translate with a table.
+
+def escape_text(text):
+    # Prose: character references the author wrote are kept as written
+    if "&" in text:
+        if ";" in text:
+            text = _BARE_AMP_RE.sub("&amp;", text)
+        else:
+            text = text.replace("&", "&amp;")
+    if "<" in text or ">" in text:
+        text = text.replace("<", "&lt;").replace(">", "&gt;")
+    return text
+
+
+def escape_code(text):
+    # Code is shown literally, so every "&" is escaped
+    if "&" not in text and "<" not in text and ">" not in text:
+        return text
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def escape_attribute(value):
+    if "&" not in value and "<" not in value and ">" not in value and '"' not in value:
+        return value
+    return (
+        value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        .replace('"', "&quot;")
+    )
+
+
 class HTMLNode:
+    # Pages produce hundreds of thousands of nodes; no per-instance __dict__
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
 
-    def to_html(self):
+    def to_html(self, url_prefix=""):
         raise NotImplementedError("to_html method not implemented")
 
-    def props_to_html(self):
+    def iter_html(self, url_prefix=""):
+        # Yield the HTML in chunks; joined, they equal to_html()
+        yield self.to_html(url_prefix)
+
+    def write_to(self, file, url_prefix=""):
+        for chunk in self.iter_html(url_prefix):
+            file.write(chunk)
+
+    def props_to_html(self, url_prefix=""):
         if self.props is None:
             return ""
         props_html = ""
         for prop in self.props:
-            props_html += f' {prop}="{self.props[prop]}"'
+            # Non-string values, such as a width of 100, are written with str()
+            value = str(self.props[prop])
+            if url_prefix and prop in URL_PROPS and value.startswith("/") and not value.startswith("//"):
+                value = url_prefix + value
+            props_html += f' {prop}="{escape_attribute(value)}"'
         return props_html
 
     def __repr__(self):
@@ -21,33 +80,99 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
-        if self.value is None:
+    def to_html(self, url_prefix=""):
+        # The value is text; inside <code> it is shown exactly as written
+        value = self.value
+        if value is None:
             raise ValueError("invalid HTML: no value")
-        if self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        if value.__class__ is not str:
+            value = str(value)
+        tag = self.tag
+        # The escapers' own fast path, inlined for the common leaf
+        if "&" in value or "<" in value or ">" in value:
+            value = escape_code(value) if tag == "code" else escape_text(value)
+        if tag is None:
+            return value
+        return f"<{tag}{self.props_to_html(url_prefix)}>{value}</{tag}>"
 
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 
+class VerbatimNode(HTMLNode):
+    # Text shown exactly as written, such as the contents of a code block.
+    # It keeps the list of lines it was parsed from and only joins them while
+    # it is serialized, a batch of lines at a time, so a large listing is
+    # never held as a single string. Lines given without a line ending, as
+    # markdown_to_html_node splits them, are kept as the same string objects;
+    # lines read from a file are each copied once, without their newline.
+    __slots__ = ("lines",)
+
+    def __init__(self, tag, lines, props=None):
+        super().__init__(tag, None, None, props)
+        self.lines = lines
+
+    def text(self):
+        lines = self.lines
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def to_html(self, url_prefix=""):
+        return "".join(self.iter_html(url_prefix))
+
+    def iter_html(self, url_prefix=""):
+        yield f"<{self.tag}{self.props_to_html(url_prefix)}>"
+        lines = self.lines
+        for start in range(0, len(lines), VERBATIM_BATCH_LINES):
+            yield escape_code("\n".join(lines[start:start + VERBATIM_BATCH_LINES]))
+            yield "\n"
+        yield f"</{self.tag}>"
+
+    def __repr__(self):
+        return f"VerbatimNode({self.tag}, {len(self.lines)} lines, {self.props})"
+
+
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def to_html(self, url_prefix=""):
+        return "".join(self.iter_html(url_prefix))
+
+    def iter_html(self, url_prefix=""):
+        # Walk the tree with an explicit stack instead of recursing, so every
+        # node costs one open and one close chunk and no subtree is built up
+        # as an intermediate string.
+        self._check()
+        yield f"<{self.tag}{self.props_to_html(url_prefix)}>"
+        stack = [(self.tag, iter(self.children))]
+        while stack:
+            tag, children = stack[-1]
+            for child in children:
+                if isinstance(child, ParentNode):
+                    child._check()
+                    yield f"<{child.tag}{child.props_to_html(url_prefix)}>"
+                    stack.append((child.tag, iter(child.children)))
+                    break
+                if isinstance(child, LeafNode):
+                    yield child.to_html(url_prefix)
+                else:
+                    yield from child.iter_html(url_prefix)
+            else:
+                stack.pop()
+                yield f"</{tag}>"
+
+    def _check(self):
         if self.tag is None:
             raise ValueError("invalid HTML: no tag")
         if self.children is None:
             raise ValueError("invalid HTML: no children")
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
@@ -1,4 +1,8 @@
 import re
+import string
+import unicodedata
+from bisect import bisect_right
+from functools import lru_cache
 from textnode import *
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
@@ -24,6 +28,9 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 def split_nodes_link(old_nodes):
     new_nodes = []
     for node in old_nodes:
+        if node.text_type != TextType.TEXT:
+            new_nodes.append(node)
+            continue
         links = extract_markdown_links(node.text)
         if not links:
             new_nodes.append(node)
@@ -44,8 +51,8 @@ def split_nodes_link(old_nodes):
             # The remaining text becomes our new text to process
             text = parts[1]
 
-            if text:
-                new_nodes.append(TextNode(text, TextType.TEXT))
+        if text:
+            new_nodes.append(TextNode(text, TextType.TEXT))
 
     return new_nodes
         
@@ -78,16 +85,256 @@ def split_nodes_image(old_nodes):
             new_nodes.append(TextNode(original_text, TextType.TEXT))
     return new_nodes
 
+# Everything that isn't plain text. The first five alternatives are fast
+# paths for the common case, a span with nothing special inside it; the rest
+# are a run of * or _ that may open or close emphasis, a run of backticks
+# that may start a code span, an image and a link. The leading lookahead
+# lets the regex engine skip plain text with a fast character-set scan
+# instead of trying every alternative at every position.
+_TOKEN_RE = re.compile(
+    r"(?=[*_`!\[])(?:"
+    r"\*\*([^*_`\[]+)\*\*(?!\*)"
+    r"|__([^*_`\[]+)__(?!_)"
+    r"|\*([^*_`\[]+)\*(?!\*)"
+    r"|_([^*_`\[]+)_(?!_)"
+    r"|`([^`]+)`(?!`)"
+    r"|(\*+|_+)"
+    r"|(`+)"
+    r"|!\[([^\[\]]*)\]\(([^\(\)]*)\)"
+    r"|\[([^\[\]]*)\]\(([^\(\)]*)\))"
+)
+_BACKTICKS_RE = re.compile(r"`+")
+
+_PUNCTUATION = frozenset(string.punctuation)
+
+
+def _is_punctuation(char):
+    if char in _PUNCTUATION:
+        return True
+    return char > "\x7f" and unicodedata.category(char)[0] in "PS"
+
+
+@lru_cache(maxsize=4096)
+def _flanking(char, before, after):
+    # (can open, can close) for a run of char between before and after
+    before_space = before.isspace()
+    after_space = after.isspace()
+    before_punct = _is_punctuation(before)
+    after_punct = _is_punctuation(after)
+    left_flanking = not after_space and (not after_punct or before_space or before_punct)
+    right_flanking = not before_space and (not before_punct or after_space or after_punct)
+    if char == "*":
+        return left_flanking, right_flanking
+    # An underscore inside a word (snake_case) neither opens nor closes
+    return (
+        left_flanking and (not right_flanking or before_punct),
+        right_flanking and (not left_flanking or after_punct),
+    )
+
+
+class _Run:
+    # A run of * or _ characters and what the emphasis pass made of it: the
+    # emphasis it closes (innermost first), the characters left over as
+    # literal text, and the emphasis it opens (innermost first)
+    __slots__ = (
+        "index", "char", "count", "length", "can_open", "can_close", "prev", "next", "opens", "closes",
+    )
+
+    def __init__(self, index, char, length, can_open, can_close):
+        self.index = index
+        self.char = char
+        self.count = self.length = length
+        self.can_open = can_open
+        self.can_close = can_close
+        self.prev = self.next = None
+        self.opens = []
+        self.closes = []
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    return nodes
-       
+    # One pass over the text finds code spans, links, images and the runs of
+    # * and _ that may open or close emphasis; a second pass over just the
+    # runs pairs them up. Anything that doesn't pair up stays literal text,
+    # so no input is rejected, and emphasis may nest (see _match_emphasis).
+    items = []
+    runs = []
+    backtick_runs = None
+    plain_start = 0
+    length = len(text)
+    rescan_at = 0
+    while rescan_at is not None:
+        tokens = _TOKEN_RE.finditer(text, rescan_at)
+        rescan_at = None
+        for match in tokens:
+            start = match.start()
+            if start < plain_start:
+                # Inside a code span. If the token runs past the span's end,
+                # rescan from there so nothing after the span is missed.
+                if match.end() > plain_start:
+                    rescan_at = plain_start
+                    break
+                continue
+            group = match.lastindex
+            end = match.end()
+            if group <= 4:
+                # A simple span only stands on its own if its opening run
+                # can't also close (and so pair with something earlier) and
+                # its closing run can close; otherwise fall back to the
+                # delimiter stack from the opening run on
+                char = text[start]
+                content = match.group(group)
+                run_length = 2 if group <= 2 else 1
+                before = text[start - 1] if start > 0 else " "
+                after = text[end] if end < length else " "
+                can_open, can_close = _flanking(char, before, content[0])
+                if can_open and not can_close and _flanking(char, content[-1], after)[1]:
+                    node = TextNode(content, TextType.BOLD if run_length == 2 else TextType.ITALIC)
+                else:
+                    end = rescan_at = start + run_length
+                    node = _Run(len(runs), char, run_length, can_open, can_close)
+                    runs.append(node)
+            elif group == 5:
+                node = TextNode(match.group(5), TextType.CODE)
+            elif group == 6:
+                char = text[start]
+                before = text[start - 1] if start > 0 else " "
+                after = text[end] if end < length else " "
+                can_open, can_close = _flanking(char, before, after)
+                node = _Run(len(runs), char, end - start, can_open, can_close)
+                runs.append(node)
+            elif group == 7:
+                if backtick_runs is None:
+                    backtick_runs = {}
+                    for run in _BACKTICKS_RE.finditer(text):
+                        backtick_runs.setdefault(run.end() - run.start(), []).append(run.start())
+                # A code span ends at the next run of exactly as many
+                # backticks; without one the backticks are literal
+                closers = backtick_runs[end - start]
+                i = bisect_right(closers, start)
+                if i == len(closers):
+                    continue
+                node = TextNode(text[end:closers[i]], TextType.CODE)
+                end = closers[i] + end - start
+            elif group == 9:
+                node = TextNode(match.group(8), TextType.IMAGE, match.group(9))
+            else:
+                node = TextNode(match.group(10), TextType.LINK, match.group(11))
+            if plain_start < start:
+                items.append(TextNode(text[plain_start:start], TextType.TEXT))
+            items.append(node)
+            plain_start = end
+            if rescan_at is not None:
+                break
+    if plain_start < length:
+        items.append(TextNode(text[plain_start:], TextType.TEXT))
+
+    if not runs:
+        return items
+    _match_emphasis(runs)
+    return _build_nodes(items)
+
+
+def _match_emphasis(runs):
+    # The CommonMark delimiter stack algorithm. Each closer looks back for
+    # the nearest compatible opener; a match takes two characters (bold) or
+    # one (italic) from each side and drops every run between the two from
+    # the stack, so matches always nest properly. openers_bottom remembers
+    # where a failed search stopped so the next search of the same kind
+    # doesn't cover the same ground again, which keeps the pass linear.
+    for i in range(1, len(runs)):
+        runs[i - 1].next = runs[i]
+        runs[i].prev = runs[i - 1]
+    openers_bottom = {}
+    closer = runs[0]
+    while closer is not None:
+        if not closer.can_close:
+            closer = closer.next
+            continue
+        key = (closer.char, closer.can_open, closer.length % 3)
+        bottom = openers_bottom.get(key, -1)
+        opener = closer.prev
+        while opener is not None and opener.index > bottom:
+            if opener.char == closer.char and opener.can_open:
+                # A run that can both open and close can't pair up with one
+                # whose lengths sum to a multiple of three (CommonMark rule 9)
+                if not (
+                    (closer.can_open or opener.can_close)
+                    and (opener.length + closer.length) % 3 == 0
+                    and (opener.length % 3 != 0 or closer.length % 3 != 0)
+                ):
+                    break
+            opener = opener.prev
+        else:
+            openers_bottom[key] = -1 if closer.prev is None else closer.prev.index
+            following = closer.next
+            if not closer.can_open:
+                _unlink(closer)
+            closer = following
+            continue
+
+        use = 2 if opener.count >= 2 and closer.count >= 2 else 1
+        text_type = TextType.BOLD if use == 2 else TextType.ITALIC
+        opener.count -= use
+        closer.count -= use
+        opener.opens.append(text_type)
+        closer.closes.append(text_type)
+        opener.next = closer
+        closer.prev = opener
+        if opener.count == 0:
+            _unlink(opener)
+        if closer.count == 0:
+            following = closer.next
+            _unlink(closer)
+            closer = following
+
+
+def _unlink(run):
+    if run.prev is not None:
+        run.prev.next = run.next
+    if run.next is not None:
+        run.next.prev = run.prev
+
+
+def _build_nodes(items):
+    # Turn the scanned items into TextNodes, nesting the content between
+    # matched runs and joining leftover delimiters into the text around them
+    out = []
+    stack = []
+    pending = []
+    for item in items:
+        if item.__class__ is _Run:
+            for _ in item.closes:
+                if pending:
+                    out.append(TextNode("".join(pending), TextType.TEXT))
+                    pending = []
+                children = out
+                opened_type, out = stack.pop()
+                out.append(_emphasis_node(opened_type, children))
+            if item.count:
+                pending.append(item.char * item.count)
+            for text_type in reversed(item.opens):
+                if pending:
+                    out.append(TextNode("".join(pending), TextType.TEXT))
+                    pending = []
+                stack.append((text_type, out))
+                out = []
+        elif item.text_type is TextType.TEXT:
+            pending.append(item.text)
+        else:
+            if pending:
+                out.append(TextNode("".join(pending), TextType.TEXT))
+                pending = []
+            out.append(item)
+    if pending:
+        out.append(TextNode("".join(pending), TextType.TEXT))
+    return out
+
+
+def _emphasis_node(text_type, children):
+    if len(children) == 1 and children[0].text_type == TextType.TEXT:
+        return TextNode(children[0].text, text_type)
+    return TextNode(None, text_type, children=children)
+
 def extract_markdown_images(text):
     return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
 
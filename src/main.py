@@ -1,98 +1,507 @@
-import os, shutil, sys
+import argparse, os, shutil, sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from pathlib import Path
-from block_markdown import markdown_to_html_node
+from block_markdown import (
+    PARSER_VERSION, iter_block_nodes, set_inline_memo, inline_memo_stats
+)
+from cache import DEFAULT_MAX_BYTES, MAX_SOURCE_BYTES, RenderCache
+from htmlnode import ParentNode, escape_text
+from metadata import DocumentMetadata, parse_document
+from pageio import ChunkBuffer, PageWriter, read_text, write_atomic
+from template import load_template, url_prefix
+from manifest import (
+    MANIFEST_PATH, empty_manifest, load_manifest, save_manifest, remove_output
+)
+from site_index import (
+    BROKEN_LINKS_NAME, load_site_index, write_broken_links, write_site_files
+)
+from statindex import STAT_INDEX_NAME, StatIndex, list_dir
+from sync import sync_tree
+import profiler
+
+DIR_PATH_STATIC = "./static"
+DIR_PATH_DOCS = "./docs"
+DIR_PATH_CONTENT = "./content"
+TEMPLATE_PATH = "./template.html"
+# A _template.html in a content directory replaces the template for the pages below it
+SECTION_TEMPLATE_NAME = "_template.html"
+PROFILE_PATH = "./.build/profile.json"
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Generate the site from content/ into docs/")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only rewrite outputs whose inputs changed since the last build",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="render pages on N worker processes (0 uses every CPU core)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="parse every page instead of reusing renders cached in .build/cache",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="evict least recently used cache entries above this many MB",
+    )
+    parser.add_argument(
+        "--inline-memo",
+        type=int,
+        default=0,
+        metavar="N",
+        help="memoize inline rendering of the N most recently seen texts",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="hash static files whose mtime changed before copying them again",
+    )
+    parser.add_argument(
+        "--link-assets",
+        action="store_true",
+        help="hardlink static files into docs/ instead of copying them",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="print why each page is rendered again",
+    )
+    parser.add_argument(
+        "--site-url",
+        default="",
+        metavar="URL",
+        help="absolute URL the site is served from, for sitemap.xml and the blog feed",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=PROFILE_PATH,
+        metavar="PATH",
+        help=f"record per-phase timings and write them as JSON (default {PROFILE_PATH})",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of slowest pages to list with --profile",
+    )
+    args = parser.parse_args(argv)
+    if args.inline_memo < 0:
+        parser.error("--inline-memo must be 0 (off) or a positive number of texts")
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
+    return args
 
 def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+    if sys.argv[1:2] == ["serve"]:
+        from devserver import serve_main
+        serve_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["render-server"]:
+        from service import service_main
+        service_main(sys.argv[2:])
+        return
+
+    args = parse_args(sys.argv[1:])
+    basepath = args.basepath
     print(basepath)
-    dir_path_static = "./static"
-    dir_path_docs = "./docs"
-    dir_path_content = "./content"
-    template_path = "./template.html"
-    create_public()
-    
-    print("Generating content...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_docs, basepath)
+    dir_path_static = DIR_PATH_STATIC
+    dir_path_docs = DIR_PATH_DOCS
+    dir_path_content = DIR_PATH_CONTENT
+    template_path = TEMPLATE_PATH
+    cache = None if args.no_cache else RenderCache(max_bytes=args.cache_size * 1024 * 1024)
+    set_inline_memo(args.inline_memo)
+    if args.profile:
+        profiler.enable()
+
+    if args.incremental:
+        print("Generating content (incremental)...")
+    else:
+        print("Generating content...")
+    build_incremental(
+        dir_path_static, dir_path_content, template_path, dir_path_docs, basepath,
+        jobs=args.jobs, cache=cache, force=not args.incremental, checksum=args.checksum,
+        link_assets=args.link_assets, site_url=args.site_url, explain=args.explain,
+    )
+
+    if cache is not None:
+        cache.prune()
+    stats = inline_memo_stats()
+    if stats is not None and args.jobs <= 1:
+        print(
+            f"inline memo: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['evictions']} evictions ({stats['size']}/{stats['maxsize']} entries)"
+        )
+    build_profile = profiler.active()
+    if build_profile is not None:
+        build_profile.write_json(args.profile)
+        print(build_profile.format_summary(args.profile_top))
+        print(f"profile written to {args.profile}")
+
+
+
+def create_public(static_dir=DIR_PATH_STATIC, docs_dir=DIR_PATH_DOCS, previous=None,
+                  checksum=False, link=False, index=None):
+    # Without a record of what the last build wrote, start from a clean docs/
+    if previous is None and os.path.exists(docs_dir):
+        shutil.rmtree(docs_dir)
+    os.makedirs(docs_dir, exist_ok=True)
+
+    # Copy only the static files that changed and prune the ones that are gone
+    return sync_tree(static_dir, docs_dir, previous or {}, checksum, link, index)
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath, jobs=1,
+                             cache=None):
+    pages = discover_pages(dir_path_content, dest_dir_path)
+    return render_pages(pages, template_path, basepath, jobs, cache)
+
+
+def discover_pages(dir_path_content, dest_dir_path, index=None):
+    pages = []
+    with profiler.phase("discover"):
+        files = collect_files(dir_path_content, index)
+    # Pages come grouped by directory; each output directory is worked out once
+    dest_dirs = {}
+    for from_path in files:
+        dir_path, name = os.path.split(from_path)
+        dest_dir = dest_dirs.get(dir_path)
+        if dest_dir is None:
+            dest_dir = dest_dirs[dir_path] = page_dest_dir(dir_path, dir_path_content, dest_dir_path)
+        pages.append((from_path, os.path.join(dest_dir, html_name(name))))
+    return pages
 
 
+def page_dest(from_path, dir_path_content, dest_dir_path):
+    dir_path, name = os.path.split(from_path)
+    return os.path.join(page_dest_dir(dir_path, dir_path_content, dest_dir_path), html_name(name))
 
-def create_public():
-    if os.path.exists("docs"):
-        shutil.rmtree("docs")  # Clean out the old 'public' directory
 
-    os.mkdir("docs")  # Recreate it fresh
+def page_dest_dir(dir_path, dir_path_content, dest_dir_path):
+    rel_dir = os.path.relpath(dir_path, dir_path_content)
+    dest_dir = str(Path(os.path.join(dest_dir_path, rel_dir)))
+    return "" if dest_dir == "." else dest_dir
 
-    static_dir = "static"
-    docs_dir = "docs"
 
-    # First, copy the static files into the public directory
-    create_public_recursive(static_dir, docs_dir)
+def html_name(name):
+    # The name with its suffix replaced, by the rules of Path.with_suffix
+    dot = name.rfind(".")
+    if 0 < dot < len(name) - 1:
+        name = name[:dot]
+    return name + ".html"
 
 
-def create_public_recursive(source, destination):
-    if not os.path.exists(destination):
-        os.mkdir(destination)  # Ensure the destination exists before copying
+def render_pages(pages, template_path, basepath, jobs=1, cache=None, templates=None):
+    # Returns each rendered page's DocumentMetadata, keyed by source path.
+    # templates maps pages to a template other than template_path.
+    jobs_list = [
+        (from_path, dest_path, templates.get(from_path, template_path) if templates else template_path)
+        for from_path, dest_path in pages
+    ]
+    metadata = {}
+    if jobs <= 1 or len(pages) <= 1:
+        # Each page is written on a writer thread while the next one parses
+        with PageWriter() as writer:
+            for from_path, dest_path, page_template_path in jobs_list:
+                metadata[from_path] = generate_page(
+                    from_path, page_template_path, dest_path, basepath, cache, writer
+                )
+        return metadata
 
-    for item in os.listdir(source):
-        item_path = os.path.join(source, item)
-        dest_path = os.path.join(destination, item)
+    # Small chunks keep the workers balanced, large enough ones keep IPC cheap
+    chunksize = max(1, len(pages) // (jobs * 4))
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(basepath, cache, memo_size(), profiler.active() is not None),
+    ) as executor:
+        # map() yields in submission order, so the log matches a serial build
+        results = executor.map(_render_in_worker, jobs_list, chunksize=chunksize)
+        for (from_path, dest_path, page_template_path), page_metadata, page_profile in results:
+            print(f" * {from_path} {page_template_path} -> {dest_path}")
+            metadata[from_path] = page_metadata
+            if page_profile is not None:
+                profiler.active().add_page(from_path, page_profile)
+    return metadata
+
+
+_worker_basepath = None
+_worker_cache = None
+
+
+def memo_size():
+    stats = inline_memo_stats()
+    return 0 if stats is None else stats["maxsize"]
+
+
+def _init_worker(basepath, cache, inline_memo_size, profile):
+    global _worker_basepath, _worker_cache
+    set_inline_memo(inline_memo_size)
+    if profile:
+        profiler.enable()
+    _worker_basepath = basepath
+    _worker_cache = cache
+
+
+def _render_in_worker(page):
+    from_path, dest_path, template_path = page
+    # Compiled once per worker and template, see load_template
+    template = load_template(template_path, url_prefix(_worker_basepath))
+    metadata = write_page(from_path, template, dest_path, _worker_basepath, _worker_cache)
+    worker_profile = profiler.active()
+    if worker_profile is None:
+        return page, metadata, None
+    # Ship the page's timings back to the parent instead of accumulating here
+    worker_profile.phases.clear()
+    return page, metadata, worker_profile.pages.pop(from_path)
+
+
+def collect_files(source, index=None):
+    # Sorted list of every file below source, in a stable order. Names
+    # starting with "_" are templates and partials rather than pages. With a
+    # statindex.StatIndex, directories that have not changed are not listed.
+    files = []
+    for name, is_dir in list_dir(source, index):
+        if name.startswith("_"):
+            continue
+        path = os.path.join(source, name)
+        if is_dir:
+            files.extend(collect_files(path, index))
+        else:
+            files.append(path)
+    return files
 
-        if os.path.isfile(item_path):
-            shutil.copy(item_path, dest_path)
-        elif os.path.isdir(item_path):
-            os.mkdir(dest_path)  # Create subdirectory in destination
-            create_public_recursive(item_path, dest_path)  # Recurse into subdirectory
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for filename in os.listdir(dir_path_content):
-        from_path = os.path.join(dir_path_content, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path, basepath)
+def page_template(from_path, dir_path_content, template_path, index=None):
+    # The nearest section template above the page, or the site template.
+    # With an index the directories' listings answer instead of a stat each.
+    dir_path = os.path.dirname(from_path)
+    stop = os.path.normpath(dir_path_content)
+    while True:
+        candidate = os.path.join(dir_path, SECTION_TEMPLATE_NAME)
+        if index is not None:
+            found = index.has_file(dir_path or ".", SECTION_TEMPLATE_NAME)
         else:
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
+            found = os.path.isfile(candidate)
+        if found:
+            return candidate
+        if os.path.normpath(dir_path) == stop or dir_path in ("", os.sep):
+            return template_path
+        dir_path = os.path.dirname(dir_path)
 
 
-def generate_page(from_path, template_path, dest_path, basepath):
+def scan_sources(dir_path_content, template_path, dest_dir_path, basepath, index=None):
+    # Files whose size and mtime match the index's record from the last
+    # build keep their hash without being read
+    if index is None:
+        index = StatIndex()
+    manifest = empty_manifest(basepath, PARSER_VERSION)
+    dependencies = {}
+    section_templates = {}
+    for from_path, dest_path in discover_pages(dir_path_content, dest_dir_path, index):
+        dir_path = os.path.dirname(from_path)
+        page_template_path = section_templates.get(dir_path)
+        if page_template_path is None:
+            page_template_path = page_template(from_path, dir_path_content, template_path, index)
+            section_templates[dir_path] = page_template_path
+        deps = dependencies.get(page_template_path)
+        if deps is None:
+            deps = dependencies[page_template_path] = load_template(page_template_path).dependencies
+            with profiler.phase("hash"):
+                for path in deps:
+                    if path not in manifest["deps"]:
+                        manifest["deps"][path] = index.hash_file(path)
+        with profiler.phase("hash"):
+            stat = os.stat(from_path)
+            manifest["pages"][from_path] = {
+                "hash": index.hash_file(from_path, stat),
+                "dest": dest_path,
+                "mtime": stat.st_mtime_ns,
+                "deps": deps,
+            }
+    return manifest
+
+
+def rebuild_reasons(old, new, from_path, force=False):
+    # Why a page has to be rendered again; empty when its output is current
+    if force:
+        return ["full build"]
+    entry = new["pages"][from_path]
+    old_entry = old["pages"].get(from_path)
+    if old_entry is None:
+        return ["new page"]
+    reasons = []
+    if old_entry["hash"] != entry["hash"]:
+        reasons.append("source changed")
+    if old_entry["dest"] != entry["dest"]:
+        reasons.append("output moved")
+    elif not os.path.exists(entry["dest"]):
+        reasons.append("output missing")
+    if old["basepath"] != new["basepath"]:
+        reasons.append("basepath changed")
+    if old.get("parser_version") != new["parser_version"]:
+        reasons.append("markdown parser changed")
+    if old_entry["deps"][0] != entry["deps"][0]:
+        reasons.append(f"template is now {entry['deps'][0]}")
+    for path in entry["deps"]:
+        if old["deps"].get(path) != new["deps"][path]:
+            reasons.append(f"{path} changed")
+    return reasons
+
+
+def build_incremental(dir_path_static, dir_path_content, template_path, dest_dir_path, basepath,
+                      manifest_path=MANIFEST_PATH, jobs=1, cache=None, force=False,
+                      checksum=False, link_assets=False, site_url="", explain=False):
+    # force re-renders every page; a full build is an incremental one where
+    # nothing is considered up to date
+    old = load_manifest(manifest_path)
+    stat_index = StatIndex(os.path.join(os.path.dirname(manifest_path), STAT_INDEX_NAME))
+    new = scan_sources(dir_path_content, template_path, dest_dir_path, basepath, stat_index)
+
+    removed = 0
+    for from_path, old_entry in old["pages"].items():
+        new_entry = new["pages"].get(from_path)
+        if new_entry is None or new_entry["dest"] != old_entry["dest"]:
+            remove_output(old_entry["dest"], dest_dir_path)
+            removed += 1
+
+    previous = old["static"] if old["basepath"] is not None else None
+    with profiler.phase("static"):
+        new["static"], copied, removed_static = create_public(
+            dir_path_static, dest_dir_path, previous, checksum, link_assets, stat_index
+        )
+    removed += removed_static
+
+    pages = []
+    templates = {}
+    for from_path, entry in new["pages"].items():
+        reasons = rebuild_reasons(old, new, from_path, force)
+        if not reasons:
+            # Unchanged pages keep the metadata of their last render, and the
+            # time their content last changed rather than when it was touched
+            old_entry = old["pages"][from_path]
+            entry["metadata"] = old_entry["metadata"]
+            entry["mtime"] = old_entry["mtime"]
+            continue
+        if explain:
+            print(f" ? {from_path}: {', '.join(reasons)}")
+        pages.append((from_path, entry["dest"]))
+        templates[from_path] = entry["deps"][0]
+    rendered_metadata = render_pages(pages, template_path, basepath, jobs, cache, templates)
+    for from_path, metadata in rendered_metadata.items():
+        new["pages"][from_path]["metadata"] = metadata.to_dict()
+    rendered = len(pages)
+
+    with profiler.phase("index"):
+        index = load_site_index(new, dest_dir_path)
+        base_url = site_url.rstrip("/") + url_prefix(basepath) if site_url else None
+        write_site_files(index, dest_dir_path, base_url)
+        broken = index.broken_links()
+        broken_links_path = os.path.join(os.path.dirname(manifest_path), BROKEN_LINKS_NAME)
+        write_broken_links(broken_links_path, broken)
+
+    save_manifest(new, manifest_path)
+    stat_index.save()
+    for from_path, link in broken:
+        print(f" ! {from_path}: broken link {link}")
+    print(f"{rendered} pages rendered, {copied} files copied, {removed} outputs removed")
+    if base_url is None:
+        print("no site URL given, so sitemap.xml and the blog feed were not written")
+    if broken:
+        print(f"{len(broken)} broken internal links, listed in {broken_links_path}")
+    return rendered, copied, removed
+
+
+def generate_page(from_path, template_path, dest_path, basepath, cache=None, writer=None):
     print(f" * {from_path} {template_path} -> {dest_path}")
-    from_file = open(from_path, "r")
-    markdown_content = from_file.read()
-    from_file.close()
-
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
-
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
-
-    title = extract_title(markdown_content)
-
-    if basepath.endswith('/') and basepath != '/':
-        basepath = basepath[:-1]
-    
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-        
-    template = template.replace('href="/', f'href="{basepath}/')
-    template = template.replace('src="/', f'src="{basepath}/')
-
-
-    dest_dir_path = os.path.dirname(dest_path)
-    if dest_dir_path != "":
-        os.makedirs(dest_dir_path, exist_ok=True)
-    to_file = open(dest_path, "w")
-    to_file.write(template)
-
-
-def extract_title(md):
-    lines = md.split("\n")
-    for line in lines:
-        if line.startswith("# "):
-            return line[2:]
-    raise ValueError("no title found")
-        
+    template = load_template(template_path, url_prefix(basepath))
+    return write_page(from_path, template, dest_path, basepath, cache, writer)
+
+
+def write_page(from_path, template, dest_path, basepath, cache=None, writer=None):
+    # Returns the page's DocumentMetadata. With a pageio.PageWriter the page
+    # may still be on its way to disk when this returns.
+    with profiler.page(from_path):
+        return _write_page(from_path, template, dest_path, basepath, cache, writer)
+
+
+def _write_page(from_path, template, dest_path, basepath, cache, writer):
+    # template is a CompiledTemplate already rebased for this basepath;
+    # links and images in the content get the prefix as they are serialized
+    prefix = url_prefix(basepath)
+    size = os.path.getsize(from_path)
+    if cache is not None and size <= MAX_SOURCE_BYTES:
+        with profiler.phase("read"):
+            markdown_content = read_text(from_path)
+        with profiler.phase("cache"):
+            key = cache.key(markdown_content, prefix)
+            entry = cache.get(key)
+        if entry is None:
+            node, metadata = parse_document(markdown_content)
+            if metadata.title is None:
+                raise ValueError("no title found")
+            with profiler.phase("to_html"):
+                html = node.to_html(prefix)
+            with profiler.phase("cache"):
+                cache.put(key, metadata, html)
+        else:
+            metadata, html = entry
+        write_output(dest_path, template, metadata.title, html, writer)
+        return metadata
+
+    metadata = DocumentMetadata()
+    with open(from_path, "r") as from_file:
+        nodes = iter_block_nodes(from_file, metadata)
+        # The title is written before the content, so hold back blocks only
+        # until the title heading has been parsed (normally the first block)
+        head = []
+        for node in nodes:
+            head.append(node)
+            if metadata.title is not None:
+                break
+        if metadata.title is None:
+            raise ValueError("no title found")
+
+        children = chain(head, nodes)
+        if template.slot_count("Content") > 1:
+            children = list(children)  # a generator can only be written once
+        page = ParentNode("div", children)
+        # Blocks are parsed and written one at a time, so memory stays bounded
+        # by the largest block rather than the whole document. Sources too
+        # large to cache are not held for the writer threads either.
+        write_output(
+            dest_path, template, metadata.title, lambda file: _serialize(page, file, prefix),
+            writer if size <= MAX_SOURCE_BYTES else None,
+        )
+    return metadata
+
+
+def _serialize(node, file, prefix):
+    with profiler.phase("to_html"):
+        node.write_to(file, prefix)
+
+
+def write_output(dest_path, template, title, content, writer=None):
+    values = {"Title": escape_text(title), "Content": content}
+    with profiler.phase("write"):
+        if writer is None:
+            write_atomic(dest_path, lambda file: template.render_to(file, values))
+            return
+        # Render here, as references to the page's strings, and leave the
+        # disk to the writer threads
+        chunks = ChunkBuffer()
+        template.render_to(chunks, values)
+        writer.submit(dest_path, chunks)
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,62 @@
+import hashlib
+import json
+import os
+
+from pageio import write_atomic
+
+MANIFEST_VERSION = 4
+MANIFEST_PATH = "./.build/manifest.json"
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def empty_manifest(basepath=None, parser_version=None):
+    # pages[source]["deps"] lists the template files a page was rendered
+    # with, its template first; deps maps each of those files to its hash.
+    # parser_version is the block_markdown.PARSER_VERSION the pages were
+    # rendered with.
+    return {
+        "version": MANIFEST_VERSION,
+        "basepath": basepath,
+        "parser_version": parser_version,
+        "deps": {},
+        "static": {},
+        "pages": {},
+    }
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return empty_manifest()
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty_manifest()
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    return manifest
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    write_atomic(path, lambda f: json.dump(manifest, f, indent=1, sort_keys=True))
+
+
+def remove_output(path, stop_dir):
+    # Delete a generated file and any directories it leaves empty
+    if os.path.exists(path):
+        os.remove(path)
+    dir_path = os.path.dirname(path)
+    stop_dir = os.path.normpath(stop_dir)
+    while dir_path and os.path.normpath(dir_path) != stop_dir:
+        try:
+            os.rmdir(dir_path)
+        except OSError:
+            break
+        dir_path = os.path.dirname(dir_path)
@@ -0,0 +1,48 @@
+from collections import OrderedDict
+
+
+class LRUMemo:
+    # Bounded least-recently-used memo for a one-argument function, with
+    # counters for tuning maxsize
+    def __init__(self, func, maxsize=1024):
+        if maxsize <= 0:
+            raise ValueError(f"invalid memo size: {maxsize}")
+        self.func = func
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __call__(self, key):
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+            self.hits += 1
+            return entries[key]
+        self.misses += 1
+        value = self.func(key)
+        entries[key] = value
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+    def __repr__(self):
+        return (
+            f"LRUMemo({self.func.__name__}, hits={self.hits}, misses={self.misses}, "
+            f"evictions={self.evictions}, size={len(self._entries)}/{self.maxsize})"
+        )
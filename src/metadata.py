@@ -0,0 +1,81 @@
+from block_markdown import BlockType, markdown_to_html_node
+
+
+class DocumentMetadata:
+    # What the rest of the build needs to know about a page, gathered by the
+    # block parser as it builds each block's nodes: the title (the first
+    # level 1 heading, as written), an outline of (level, plain text) for
+    # every heading, a word count of the prose, and every link and image URL
+    # in document order.
+    __slots__ = ("title", "headings", "word_count", "links", "images")
+
+    def __init__(self, title=None, headings=None, word_count=0, links=None, images=None):
+        self.title = title
+        self.headings = [] if headings is None else headings
+        self.word_count = word_count
+        self.links = [] if links is None else links
+        self.images = [] if images is None else images
+
+    def add_block(self, block_type, block, node):
+        if block_type == BlockType.CODE:
+            return
+        texts = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.tag == "pre":
+                continue  # code inside a quote or list item is not prose either
+            if current.children is not None:
+                if current.tag == "li":
+                    texts.append(" ")
+                stack.extend(reversed(current.children))
+                continue
+            if current.tag == "a":
+                self.links.append(current.props["href"])
+            elif current.tag == "img":
+                self.images.append(current.props["src"])
+            texts.append(current.value)
+        text = "".join(texts)
+        self.word_count += len(text.split())
+        if block_type == BlockType.HEADING:
+            level = int(node.tag[1])
+            self.headings.append((level, text))
+            if level == 1 and self.title is None:
+                self.title = block[2:].split("\n", 1)[0]
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "headings": [list(heading) for heading in self.headings],
+            "word_count": self.word_count,
+            "links": self.links,
+            "images": self.images,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["title"],
+            [tuple(heading) for heading in data["headings"]],
+            data["word_count"],
+            data["links"],
+            data["images"],
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, DocumentMetadata):
+            return self.to_dict() == other.to_dict()
+        return False
+
+    def __repr__(self):
+        return (
+            f"DocumentMetadata({self.title!r}, {len(self.headings)} headings, "
+            f"{self.word_count} words, {len(self.links)} links, {len(self.images)} images)"
+        )
+
+
+def parse_document(markdown):
+    # The HTML node and the metadata from a single parse
+    metadata = DocumentMetadata()
+    node = markdown_to_html_node(markdown, metadata)
+    return node, metadata
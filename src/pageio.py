@@ -0,0 +1,93 @@
+import locale
+import mmap
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Sources this large are memory-mapped and decoded straight from the page
+# cache instead of being read into a buffer first
+MMAP_THRESHOLD = 1024 * 1024
+WRITER_THREADS = 2
+# Rendered pages held for the writer threads; submit() waits beyond this
+MAX_PENDING_WRITES = 32
+
+# What open() decodes text files with
+ENCODING = "utf-8" if sys.flags.utf8_mode else locale.getpreferredencoding(False)
+
+
+def read_text(path):
+    # The file's text with universal newlines, the same as open(path).read()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD or size == 0:  # an empty file cannot be mapped
+            text = f.read().decode(ENCODING)
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                text = str(mapped, ENCODING)
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def write_atomic(dest_path, write):
+    # Write through a temporary file beside dest_path and rename it into
+    # place, so nothing reading the output ever sees half a page. write(file)
+    # writes the contents.
+    dest_dir_path = os.path.dirname(dest_path)
+    if dest_dir_path != "":
+        os.makedirs(dest_dir_path, exist_ok=True)
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            write(f)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ChunkBuffer(list):
+    # A file-like list that keeps each string written to it, uncopied
+    write = list.append
+
+
+class PageWriter:
+    # Writes rendered pages on background threads, so the next page is
+    # parsed while the last one goes to disk. Each page is handed over as a
+    # list of strings and written with write_atomic. close() waits for
+    # every write and raises the first error.
+    def __init__(self, threads=WRITER_THREADS, max_pending=MAX_PENDING_WRITES):
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix="page-writer")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._errors = []
+
+    def submit(self, dest_path, chunks):
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(write_atomic, dest_path, lambda f: f.writelines(chunks))
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        self._slots.release()
+        if future.exception() is not None:
+            self._errors.append(future.exception())
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self._errors:
+            raise self._errors[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Let the pages already rendered land, but keep the original error
+            self._executor.shutdown(wait=True)
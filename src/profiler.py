@@ -0,0 +1,161 @@
+import json
+import os
+import time
+from contextlib import nullcontext
+
+# Shared no-op context manager handed out while profiling is off, so an
+# instrumented call costs one global lookup and an empty with-block
+_DISABLED = nullcontext()
+
+_active = None
+
+
+class Profiler:
+    # Records wall time and call counts per build phase, in aggregate and
+    # per page. Phases nest; each one is charged only its own (exclusive)
+    # time, so the phase totals add up to the time actually spent.
+    def __init__(self):
+        self.phases = {}
+        self.pages = {}
+        self.started = time.perf_counter()
+        self._stack = []
+
+    def _totals(self, name):
+        totals = self.phases.get(name)
+        if totals is None:
+            totals = self.phases[name] = [0.0, 0]
+        return totals
+
+    def _enter(self, frame):
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            parent[0][0] += now - parent[1]
+        frame[1] = now
+        self._stack.append(frame)
+
+    def _exit(self, frame):
+        now = time.perf_counter()
+        self._stack.pop()
+        totals = frame[0]
+        totals[0] += now - frame[1]
+        totals[1] += 1
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def page(self, path):
+        return _Page(self, path)
+
+    def add_page(self, path, report):
+        # Merge a page report produced by another process
+        self.pages[path] = report
+        for name, (seconds, calls) in report["phases"].items():
+            totals = self.phases.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += calls
+
+    def report(self):
+        return {
+            "total_seconds": time.perf_counter() - self.started,
+            "phases": {
+                name: {"seconds": seconds, "calls": calls}
+                for name, (seconds, calls) in sorted(self.phases.items())
+            },
+            "pages": {
+                path: {
+                    "seconds": report["seconds"],
+                    "phases": {
+                        name: {"seconds": seconds, "calls": calls}
+                        for name, (seconds, calls) in sorted(report["phases"].items())
+                    },
+                }
+                for path, report in self.pages.items()
+            },
+        }
+
+    def write_json(self, path):
+        dir_path = os.path.dirname(path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=1)
+
+    def format_summary(self, top=10):
+        lines = [f"{'phase':<12} {'seconds':>9} {'calls':>9}"]
+        for name, (seconds, calls) in sorted(self.phases.items(), key=lambda item: -item[1][0]):
+            lines.append(f"{name:<12} {seconds:>9.4f} {calls:>9}")
+        slowest = sorted(self.pages.items(), key=lambda item: -item[1]["seconds"])[:top]
+        if slowest:
+            lines.append("")
+            lines.append(f"{'slowest pages':<50} {'seconds':>9}")
+            for path, report in slowest:
+                lines.append(f"{path:<50} {report['seconds']:>9.4f}")
+        return "\n".join(lines)
+
+
+class _Phase:
+    __slots__ = ("profiler", "frame")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        # [running totals for this phase, time it last started running]
+        self.frame = [profiler._totals(name), 0.0]
+
+    def __enter__(self):
+        self.profiler._enter(self.frame)
+
+    def __exit__(self, *exc):
+        self.profiler._exit(self.frame)
+
+
+class _Page:
+    # A page's phases are the difference between the running totals at its
+    # start and end, so the hot path only ever updates one counter
+    __slots__ = ("profiler", "path", "started", "before")
+
+    def __init__(self, profiler, path):
+        self.profiler = profiler
+        self.path = path
+
+    def __enter__(self):
+        self.before = {name: tuple(totals) for name, totals in self.profiler.phases.items()}
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.started
+        phases = {}
+        for name, (total_seconds, total_calls) in self.profiler.phases.items():
+            before_seconds, before_calls = self.before.get(name, (0.0, 0))
+            if total_calls != before_calls or total_seconds != before_seconds:
+                phases[name] = [total_seconds - before_seconds, total_calls - before_calls]
+        self.profiler.pages[self.path] = {"seconds": seconds, "phases": phases}
+
+
+def enable():
+    global _active
+    _active = Profiler()
+    return _active
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def active():
+    return _active
+
+
+def phase(name):
+    if _active is None:
+        return _DISABLED
+    return _Phase(_active, name)
+
+
+def page(path):
+    if _active is None:
+        return _DISABLED
+    return _Page(_active, path)
@@ -0,0 +1,283 @@
+import argparse
+import asyncio
+import math
+import multiprocessing
+import os
+from urllib.parse import parse_qs, urlsplit
+
+from batch import make_executor, render
+
+DEFAULT_MAX_PENDING = 1024
+DEFAULT_BATCH_SIZE = 64
+# A batch stops growing once its markdown reaches this size, so one large
+# document doesn't hold up the small ones queued behind it
+DEFAULT_BATCH_BYTES = 64 * 1024
+DEFAULT_TIMEOUT = 10.0
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+class RenderError(Exception):
+    # The worker pool failed, e.g. a worker process died, rather than the
+    # markdown being rejected
+    pass
+
+
+class _Request:
+    __slots__ = ("markdown", "url_prefix", "deadline", "future")
+
+    def __init__(self, markdown, url_prefix, deadline, future):
+        self.markdown = markdown
+        self.url_prefix = url_prefix
+        self.deadline = deadline
+        self.future = future
+
+
+class RenderService:
+    # Renders markdown on a bounded process pool without blocking the event
+    # loop. Requests wait in a queue of at most max_pending entries; when it
+    # is full, render() waits for room, which pushes back on callers. While
+    # every worker is busy the queue fills up, and each free worker then
+    # takes up to batch_size queued requests in one round trip, so batches
+    # grow with load and an idle service adds no batching delay. jobs is the
+    # number of workers, 0 for one per CPU; with an executor of the caller's
+    # own, it is the number of workers that executor runs.
+    def __init__(self, jobs=0, max_pending=DEFAULT_MAX_PENDING, batch_size=DEFAULT_BATCH_SIZE,
+                 batch_bytes=DEFAULT_BATCH_BYTES, timeout=DEFAULT_TIMEOUT, executor=None):
+        if jobs == 0:
+            jobs = os.cpu_count() or 1
+        self.jobs = jobs
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.timeout = timeout
+        self._owns_executor = executor is None
+        if executor is None:
+            executor = make_executor(jobs, _worker_context())
+        self._executor = executor
+        # Two batches per worker: one running, one ready to go when it finishes
+        self._slots = asyncio.Semaphore(2 * jobs)
+        self._queue = asyncio.Queue(max_pending)
+        self._running = set()
+        self._dispatcher = None
+
+    async def start(self):
+        if self._dispatcher is None:
+            # Start the workers now rather than on the first request
+            await asyncio.get_running_loop().run_in_executor(self._executor, _render_batch, [])
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        return self
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        if self._running:
+            await asyncio.wait(self._running)
+        if self._owns_executor:
+            self._executor.shutdown()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def render(self, markdown, url_prefix="", timeout=None):
+        # Returns the HTML for markdown. Raises TimeoutError if it isn't ready
+        # within timeout seconds (the service default when None), including
+        # time spent waiting for room in the queue, ValueError for markdown
+        # the parser rejects and RenderError when the worker pool fails.
+        if timeout is None:
+            timeout = self.timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else math.inf
+        request = _Request(markdown, url_prefix, deadline, loop.create_future())
+        async with asyncio.timeout_at(deadline if timeout else None):
+            await self._queue.put(request)
+            return await request.future
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        carried = None
+        while True:
+            first = carried if carried is not None else await self._queue.get()
+            carried = None
+            await self._slots.acquire()
+            batch = [first]
+            size = len(first.markdown)
+            while len(batch) < self.batch_size and not self._queue.empty():
+                request = self._queue.get_nowait()
+                if size + len(request.markdown) > self.batch_bytes:
+                    carried = request
+                    break
+                batch.append(request)
+                size += len(request.markdown)
+
+            # Skip requests whose caller has already given up
+            now = loop.time()
+            batch = [r for r in batch if not r.future.done() and r.deadline > now]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self._executor, _render_batch, [(r.markdown, r.url_prefix) for r in batch]
+            )
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    error = RenderError(f"render failed: {e!r}")
+                    error.__cause__ = e
+                    request.future.set_exception(error)
+        else:
+            for request, (html, error) in zip(batch, results):
+                if request.future.done():
+                    continue
+                if error is None:
+                    request.future.set_result(html)
+                else:
+                    request.future.set_exception(ValueError(error))
+        finally:
+            self._slots.release()
+
+
+def _worker_context():
+    # Forked workers would inherit the sockets of any connection open at the
+    # time, holding them open after the server closes its end. Workers forked
+    # from a fork server start clean.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return None
+
+
+def _render_batch(requests):
+    # One bad document must not fail the rest of its batch
+    results = []
+    for markdown, url_prefix in requests:
+        try:
+            results.append((render(markdown, url_prefix), None))
+        except ValueError as e:
+            results.append((None, str(e)))
+    return results
+
+
+async def handle_connection(service, reader, writer):
+    # Minimal HTTP/1.1: POST /render with markdown as the body returns the
+    # HTML. ?prefix= sets the URL prefix and an X-Deadline-Ms header
+    # overrides the service timeout. Connections are kept alive.
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            parts = request_line.decode("latin-1").split()
+            length = int(headers.get("content-length", "0") or "0")
+            if len(parts) != 3 or length > MAX_BODY_BYTES:
+                await _respond(writer, 400, "bad request\n", close=True)
+                break
+            body = await reader.readexactly(length)
+            method, target, version = parts
+            status, content = await _handle(service, method, target, headers, body)
+            close = version != "HTTP/1.1" or headers.get("connection", "").lower() == "close"
+            await _respond(writer, status, content, close)
+            if close:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _handle(service, method, target, headers, body):
+    url = urlsplit(target)
+    if url.path != "/render":
+        return 404, "not found\n"
+    if method != "POST":
+        return 405, "use POST\n"
+    prefix = parse_qs(url.query).get("prefix", [""])[0]
+    timeout = None
+    if "x-deadline-ms" in headers:
+        try:
+            timeout = int(headers["x-deadline-ms"]) / 1000
+        except ValueError:
+            return 400, "invalid X-Deadline-Ms\n"
+    try:
+        return 200, await service.render(body.decode("utf-8"), prefix, timeout)
+    except TimeoutError:
+        return 504, "deadline exceeded\n"
+    except (ValueError, UnicodeDecodeError) as e:
+        return 400, f"{e}\n"
+    except RenderError as e:
+        return 500, f"{e}\n"
+
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    500: "Internal Server Error", 504: "Gateway Timeout",
+}
+
+
+async def _respond(writer, status, content, close=False):
+    body = content.encode()
+    content_type = "text/html" if status == 200 else "text/plain"
+    head = (
+        f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+        f"Content-Type: {content_type}; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+async def serve(host, port, service, ready=None):
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(service, reader, writer), host, port
+    )
+    if ready is not None:
+        ready(server)
+    async with server:
+        await server.serve_forever()
+
+
+def service_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py render-server", description="Render markdown to HTML over HTTP"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8889)
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="worker processes, 0 for one per CPU")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds per request")
+    args = parser.parse_args(argv)
+
+    async def run():
+        async with RenderService(
+            args.jobs, args.max_pending, args.batch_size, timeout=args.timeout
+        ) as service:
+            def ready(server):
+                port = server.sockets[0].getsockname()[1]
+                print(f"Rendering at http://{args.host}:{port}/render", flush=True)
+            await serve(args.host, args.port, service, ready)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
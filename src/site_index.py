@@ -0,0 +1,182 @@
+import os
+import time
+from posixpath import normpath
+from urllib.parse import urljoin, urlsplit
+from xml.sax.saxutils import escape
+
+from manifest import remove_output
+from metadata import DocumentMetadata
+from pageio import write_atomic
+
+SITEMAP_NAME = "sitemap.xml"
+FEED_NAME = "atom.xml"
+FEED_SECTION = "blog"
+# Written beside the manifest rather than published with the site
+BROKEN_LINKS_NAME = "broken_links.txt"
+
+
+class SiteIndex:
+    # Every page of the site with its URL and the DocumentMetadata gathered
+    # while it was rendered, ordered by URL. Built from the manifest, so an
+    # incremental build reuses the metadata of pages it did not re-render.
+    def __init__(self, pages, files=()):
+        # pages: (url, source path, mtime, DocumentMetadata) tuples
+        # files: site paths of everything else in the output, e.g. static files
+        self.pages = sorted(pages, key=lambda page: page[0])
+        self.paths = {url_to_path(url) for url, _, _, _ in self.pages}
+        self.paths.update(files)
+
+    def section(self, name):
+        prefix = f"/{name}/"
+        return [page for page in self.pages if page[0].startswith(prefix)]
+
+    def resolves(self, url):
+        path = url_to_path(url)
+        return path in self.paths or f"{path}/index.html" in self.paths
+
+    def broken_links(self):
+        # (source path, link) for every internal link or image that points at
+        # neither a page nor a static file
+        broken = []
+        for page_url, source, _, metadata in self.pages:
+            for link in metadata.links + metadata.images:
+                target = internal_target(page_url, link)
+                if target is not None and not self.resolves(target):
+                    broken.append((source, link))
+        return broken
+
+
+def page_url(dest_path, dest_dir_path):
+    # The site-root-relative URL a page is served at: "/blog/post/" for an
+    # index.html, "/about.html" for anything else
+    rel_path = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    if rel_path == "index.html":
+        return "/"
+    if rel_path.endswith("/index.html"):
+        return "/" + rel_path[:-len("index.html")]
+    return "/" + rel_path
+
+
+def url_to_path(url):
+    path = url.lstrip("/")
+    if path == "" or path.endswith("/"):
+        path += "index.html"
+    return path
+
+
+def internal_target(page_url, link):
+    # The site path a link points at, or None when it leaves the site
+    parts = urlsplit(link)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = urljoin(page_url, parts.path)
+    trailing = "/" if path.endswith("/") else ""
+    return normpath(path).rstrip("/") + trailing
+
+
+def load_site_index(manifest, dest_dir_path):
+    pages = []
+    for source, entry in manifest["pages"].items():
+        metadata = DocumentMetadata.from_dict(entry["metadata"])
+        pages.append((page_url(entry["dest"], dest_dir_path), source, entry["mtime"], metadata))
+    files = [
+        os.path.relpath(entry["dest"], dest_dir_path).replace(os.sep, "/")
+        for entry in manifest["static"].values()
+    ]
+    files += [SITEMAP_NAME, f"{FEED_SECTION}/{FEED_NAME}"]
+    return SiteIndex(pages, files)
+
+
+def timestamp(mtime_ns):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(mtime_ns // 1_000_000_000))
+
+
+def render_sitemap(index, base_url):
+    # base_url is the absolute site URL including the basepath, no trailing
+    # slash: sitemap locations must be absolute
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for url, _, mtime, _ in index.pages:
+        lines.append(
+            f"<url><loc>{escape(base_url + url)}</loc><lastmod>{timestamp(mtime)}</lastmod></url>"
+        )
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def render_feed(index, base_url, section=FEED_SECTION):
+    # An Atom feed of the section's pages, most recently changed first. The
+    # section's own index page, if any, names the feed rather than joining it.
+    title = section
+    entries = []
+    for page in index.section(section):
+        if page[0] == f"/{section}/":
+            title = page[3].title or title
+        else:
+            entries.append(page)
+    if not entries:
+        return None
+    entries.sort(key=lambda page: (-page[2], page[0]))
+    feed_url = f"{base_url}/{section}/"
+    updated = timestamp(entries[0][2])
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"<title>{escape(title)}</title>",
+        f"<id>{escape(feed_url)}</id>",
+        f'<link href="{escape(feed_url)}"/>',
+        f'<link rel="self" href="{escape(feed_url + FEED_NAME)}"/>',
+        f"<updated>{updated}</updated>",
+    ]
+    for url, _, mtime, metadata in entries:
+        lines += [
+            "<entry>",
+            f"<title>{escape(metadata.title or url)}</title>",
+            f"<id>{escape(base_url + url)}</id>",
+            f'<link href="{escape(base_url + url)}"/>',
+            f"<updated>{timestamp(mtime)}</updated>",
+            "</entry>",
+        ]
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def write_if_changed(path, text):
+    # Leave unchanged outputs alone so their mtimes (and the dev server) stay quiet
+    try:
+        with open(path, "r") as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    write_atomic(path, lambda f: f.write(text))
+    return True
+
+
+def write_site_files(index, dest_dir_path, base_url):
+    # Without a base_url there is nothing valid to write: the sitemap and
+    # feed specs both require absolute URLs. Any left by an earlier build
+    # are removed.
+    sitemap_path = os.path.join(dest_dir_path, SITEMAP_NAME)
+    feed_path = os.path.join(dest_dir_path, FEED_SECTION, FEED_NAME)
+    if base_url is None:
+        remove_output(sitemap_path, dest_dir_path)
+        remove_output(feed_path, dest_dir_path)
+        return
+    write_if_changed(sitemap_path, render_sitemap(index, base_url))
+    feed = render_feed(index, base_url)
+    if feed is not None:
+        write_if_changed(feed_path, feed)
+    else:
+        remove_output(feed_path, dest_dir_path)
+
+
+def write_broken_links(path, broken):
+    # One "source: broken link target" line per link, or no file at all
+    if not broken:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    write_if_changed(path, "".join(f"{source}: broken link {link}\n" for source, link in broken))
@@ -0,0 +1,101 @@
+import json
+import os
+import time
+
+from manifest import hash_file
+from pageio import write_atomic
+
+STAT_INDEX_VERSION = 1
+STAT_INDEX_NAME = "stat_index.json"
+# A timestamp this close to the moment it was read could still move without
+# changing: another write within the same clock tick leaves it as it was.
+# Such listings and hashes are used once and not trusted on the next run.
+RACY_NS = 2_000_000_000
+
+
+def scan_dir(dir_path):
+    # Sorted [name, is_dir] pairs for the files and directories in dir_path
+    with os.scandir(dir_path) as entries:
+        return sorted(
+            [entry.name, entry.is_dir()] for entry in entries if entry.is_dir() or entry.is_file()
+        )
+
+
+def list_dir(dir_path, index=None):
+    if index is None:
+        return scan_dir(dir_path)
+    return index.list_dir(dir_path)
+
+
+class StatIndex:
+    # What the last build found on disk, kept between builds:
+    #   dirs:  dir path -> [mtime_ns, sorted [name, is_dir] entries]
+    #   files: file path -> [size, mtime_ns, sha256 hex]
+    # A directory's mtime moves whenever an entry in it is added, removed or
+    # renamed, so while it stands still its listing is reused after a single
+    # stat instead of being read again. A file whose size and mtime are
+    # unchanged keeps its hash without being read. Only what this run looked
+    # at is saved, so deleted paths drop out.
+    def __init__(self, path=None):
+        self.path = path
+        self.dirs = {}
+        self.files = {}
+        self.seen_dirs = {}
+        self.seen_files = {}
+        self.file_names = {}
+        self.listed = 0
+        self.reused = 0
+        if path is not None:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == STAT_INDEX_VERSION:
+            self.dirs = data["dirs"]
+            self.files = data["files"]
+
+    def list_dir(self, dir_path):
+        seen = self.seen_dirs.get(dir_path)
+        if seen is not None:
+            return seen[1]
+        mtime = os.stat(dir_path).st_mtime_ns
+        cached = self.dirs.get(dir_path)
+        if cached is not None and cached[0] == mtime:
+            entries = cached[1]
+            self.reused += 1
+        else:
+            entries = scan_dir(dir_path)
+            self.listed += 1
+        self.seen_dirs[dir_path] = [_trusted(mtime), entries]
+        return entries
+
+    def has_file(self, dir_path, name):
+        names = self.file_names.get(dir_path)
+        if names is None:
+            names = {entry_name for entry_name, is_dir in self.list_dir(dir_path) if not is_dir}
+            self.file_names[dir_path] = names
+        return name in names
+
+    def hash_file(self, path, stat=None):
+        if stat is None:
+            stat = os.stat(path)
+        cached = self.files.get(path)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            digest = cached[2]
+        else:
+            digest = hash_file(path)
+        self.seen_files[path] = [stat.st_size, _trusted(stat.st_mtime_ns), digest]
+        return digest
+
+    def save(self):
+        data = {"version": STAT_INDEX_VERSION, "dirs": self.seen_dirs, "files": self.seen_files}
+        write_atomic(self.path, lambda f: json.dump(data, f, separators=(",", ":")))
+
+
+def _trusted(mtime_ns):
+    # The mtime to record, or None when it is too recent to rely on
+    return mtime_ns if time.time_ns() - mtime_ns > RACY_NS else None
@@ -0,0 +1,160 @@
+import errno
+import os
+import shutil
+
+from manifest import hash_file, remove_output
+from statindex import list_dir
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+# ioctl request that asks copy-on-write filesystems (btrfs, xfs) to share
+# the source's blocks with the destination instead of copying them
+FICLONE = 0x40049409
+
+# Errors meaning "this filesystem or kernel can't do that", not a real failure
+_UNSUPPORTED = {
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY, errno.EPERM,
+    errno.EBADF, errno.ETXTBSY,
+}
+
+
+def walk_files(source, index=None):
+    # Sorted (path, stat) pairs for every file below source. With a
+    # statindex.StatIndex, directories that have not changed are not listed.
+    files = []
+    for name, is_dir in list_dir(source, index):
+        path = os.path.join(source, name)
+        if is_dir:
+            files.extend(walk_files(path, index))
+        else:
+            files.append((path, os.stat(path)))
+    return files
+
+
+def is_current(dest_path, stat):
+    # Copies keep the source mtime, so matching size and mtime means unchanged
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    return dest_stat.st_size == stat.st_size and dest_stat.st_mtime_ns == stat.st_mtime_ns
+
+
+def sync_tree(source, destination, previous, checksum=False, link=False, index=None):
+    # Make destination's copies of source's files match, copying only files
+    # whose size or mtime changed. previous is the entry map returned by the
+    # last sync; files it lists that have left source are pruned.
+    entries = {}
+    copied = 0
+    for from_path, stat in walk_files(source, index):
+        dest_path = os.path.join(destination, os.path.relpath(from_path, source))
+        entry = {"dest": dest_path, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+        old_entry = previous.get(from_path)
+        current = is_current(dest_path, stat)
+        if checksum:
+            if current and old_entry is not None and "hash" in old_entry:
+                entry["hash"] = old_entry["hash"]
+            else:
+                entry["hash"] = hash_file(from_path)
+            # Same bytes under a new mtime (a fresh checkout, say): only the
+            # mtime needs fixing, not the data
+            if (not current and old_entry is not None and old_entry.get("hash") == entry["hash"]
+                    and os.path.exists(dest_path) and os.path.getsize(dest_path) == stat.st_size):
+                os.utime(dest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                current = True
+        if not current:
+            copy_file(from_path, dest_path, link)
+            copied += 1
+        entries[from_path] = entry
+
+    removed = 0
+    for from_path, old_entry in previous.items():
+        new_entry = entries.get(from_path)
+        if new_entry is None or new_entry["dest"] != old_entry["dest"]:
+            remove_output(old_entry["dest"], destination)
+            removed += 1
+    return entries, copied, removed
+
+
+def copy_file(from_path, dest_path, link=False):
+    # Copy through a temporary file and rename it into place, so readers
+    # never see a half-written asset. Returns the method that was used.
+    dest_dir_path = os.path.dirname(dest_path)
+    if dest_dir_path != "":
+        os.makedirs(dest_dir_path, exist_ok=True)
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    try:
+        method = None
+        if link:
+            method = _hardlink(from_path, tmp_path)
+        if method is None:
+            with open(from_path, "rb") as fsrc, open(tmp_path, "wb") as fdst:
+                method = _reflink(fsrc, fdst) or _copy_data(fsrc, fdst)
+            shutil.copystat(from_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return method
+
+
+def _hardlink(from_path, tmp_path):
+    # A hardlink shares the inode, so the asset costs no I/O at all. Editors
+    # that save by rename break the link, which the next sync notices.
+    try:
+        os.link(from_path, tmp_path)
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED and e.errno not in (errno.EMLINK, errno.EACCES):
+            raise
+        return None
+    return "hardlink"
+
+
+def _reflink(fsrc, fdst):
+    if fcntl is None:
+        return None
+    try:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED:
+            raise
+        return None
+    return "reflink"
+
+
+def _copy_data(fsrc, fdst):
+    # Let the kernel move the bytes when it can: copy_file_range, then
+    # sendfile, then a plain userspace copy
+    src_fd = fsrc.fileno()
+    dst_fd = fdst.fileno()
+    size = os.fstat(src_fd).st_size
+    for method, copy_range in (
+        ("copy_file_range", getattr(os, "copy_file_range", None)),
+        ("sendfile", getattr(os, "sendfile", None)),
+    ):
+        if copy_range is None:
+            continue
+        offset = 0
+        try:
+            while offset < size:
+                if method == "sendfile":
+                    sent = copy_range(dst_fd, src_fd, offset, size - offset)
+                else:
+                    sent = copy_range(src_fd, dst_fd, size - offset, offset, offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+            os.ftruncate(dst_fd, 0)
+            os.lseek(dst_fd, 0, os.SEEK_SET)
+            continue
+        return method
+    fsrc.seek(0)
+    shutil.copyfileobj(fsrc, fdst)
+    return "copy"
@@ -0,0 +1,98 @@
+import os
+import re
+
+_SLOT_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+# {{> path }} pastes in another file, relative to the one including it
+_INCLUDE_RE = re.compile(r"\{\{>\s*([^\s}]+)\s*\}\}")
+# Root-relative URLs in the template itself; "//host" URLs are left alone
+_ROOT_URL_RE = re.compile(r'\b(href|src)="/(?!/)')
+
+_compiled_templates = {}
+
+
+class CompiledTemplate:
+    def __init__(self, source, url_prefix="", dependencies=()):
+        # dependencies lists the files the source was read from, the
+        # template itself first and then everything it includes
+        self.dependencies = list(dependencies)
+        # statics[i] is written before slots[i], statics[-1] after the last slot
+        self.statics = []
+        self.slots = []
+        pos = 0
+        for match in _SLOT_RE.finditer(source):
+            self.statics.append(rebase_urls(source[pos:match.start()], url_prefix))
+            self.slots.append((match.group(1), match.group(0)))
+            pos = match.end()
+        self.statics.append(rebase_urls(source[pos:], url_prefix))
+
+    def slot_count(self, name):
+        return sum(1 for slot_name, _ in self.slots if slot_name == name)
+
+    def render_to(self, file, values):
+        # A value is either a string or a callable that writes itself to file.
+        # Slots without a value are written back out unchanged.
+        file.write(self.statics[0])
+        for i, (name, raw) in enumerate(self.slots):
+            value = values.get(name)
+            if value is None:
+                file.write(raw)
+            elif callable(value):
+                value(file)
+            else:
+                file.write(value)
+            file.write(self.statics[i + 1])
+
+
+def url_prefix(basepath):
+    # "/" and "" both mean the site lives at the root
+    return basepath.rstrip("/")
+
+
+def rebase_urls(html, prefix):
+    if not prefix:
+        return html
+    return _ROOT_URL_RE.sub(lambda match: f'{match.group(1)}="{prefix}/', html)
+
+
+def read_template(template_path, dependencies=None, including=()):
+    # The template's source with every include pasted in, recursively.
+    # Appends each file read to dependencies.
+    if template_path in including:
+        raise ValueError(f"template include cycle: {' -> '.join(including + (template_path,))}")
+    if dependencies is not None and template_path not in dependencies:
+        dependencies.append(template_path)
+    with open(template_path, "r") as f:
+        source = f.read()
+    if "{{>" not in source:
+        return source
+    including += (template_path,)
+    base_dir = os.path.dirname(template_path)
+    return _INCLUDE_RE.sub(
+        lambda match: read_template(
+            os.path.normpath(os.path.join(base_dir, match.group(1))), dependencies, including
+        ),
+        source,
+    )
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_template(template_path, prefix=""):
+    # Compile each template once per process; the files are only re-read when
+    # the size or mtime of the template or one of its includes changes
+    key = (os.path.abspath(template_path), prefix)
+    cached = _compiled_templates.get(key)
+    if cached is not None and all(_stamp(path) == stamp for path, stamp in cached[0]):
+        return cached[1]
+    dependencies = []
+    source = read_template(template_path, dependencies)
+    template = CompiledTemplate(source, prefix, dependencies)
+    stamps = [(path, _stamp(path)) for path in template.dependencies]
+    _compiled_templates[key] = (stamps, template)
+    return template
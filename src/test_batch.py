@@ -0,0 +1,29 @@
+import unittest
+
+from batch import make_executor, render, render_many
+
+
+class TestRenderMany(unittest.TestCase):
+    def test_matches_single_calls_in_order(self):
+        documents = ["**bold** comment", "# Title\n\n- a\n- b", "plain", "**bold** comment"]
+        self.assertEqual(render_many(documents), [render(md) for md in documents])
+
+    def test_accepts_any_iterable(self):
+        self.assertEqual(render_many(iter(["a", "b"])), ["<div><p>a</p></div>", "<div><p>b</p></div>"])
+        self.assertEqual(render_many([]), [])
+
+    def test_url_prefix(self):
+        self.assertEqual(
+            render_many(["[home](/index.html)"], url_prefix="/site"),
+            ['<div><p><a href="/site/index.html">home</a></p></div>'],
+        )
+
+    def test_pooled_matches_serial(self):
+        documents = [f"comment {i % 7} with _emphasis_ and `code {i}`" for i in range(40)]
+        with make_executor(2) as executor:
+            pooled = render_many(documents, threshold=10, executor=executor)
+        self.assertEqual(pooled, render_many(documents))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,28 +1,124 @@
+import io
+import os
+import tempfile
 import unittest
-from block_markdown import markdown_to_blocks, block_to_block_type, markdown_to_html_node, BlockType
+from block_markdown import markdown_to_html_node, iter_block_nodes
 
 class TestMarkdowntoBlocks(unittest.TestCase):
-    def test_markdown_to_blocks(self):
-        md = """
-    This is **bolded** paragraph
+    def test_iter_block_nodes(self):
+        source = io.StringIO("# Title\n\nsome **bold** text\n")
+        html = "".join(node.to_html() for node in iter_block_nodes(source))
+        self.assertEqual(html, "<h1>Title</h1><p>some <b>bold</b> text</p>")
+
+    def test_escaping(self):
+        html = markdown_to_html_node(
+            "# Fish & <Chips>\n\n"
+            "a < b &amp; `x && y` [q](/s?a=1&b=\"2\")\n\n"
+            "```\nif a < b && c &gt; d:\n```"
+        ).to_html()
+        self.assertEqual(
+            html,
+            "<div><h1>Fish &amp; &lt;Chips&gt;</h1>"
+            '<p>a &lt; b &amp; <code>x &amp;&amp; y</code> <a href="/s?a=1&amp;b=&quot;2&quot;">q</a></p>'
+            "<pre><code>if a &lt; b &amp;&amp; c &amp;gt; d:\n</code></pre></div>",
+        )
+
+class TestBlockParser(unittest.TestCase):
+    def html(self, md):
+        return markdown_to_html_node(md).to_html()[len("<div>"):-len("</div>")]
+
+    def test_block_fallbacks(self):
+        self.assertEqual(self.html("#no space"), "<p>#no space</p>")
+        self.assertEqual(self.html("####### Too many"), "<p>####### Too many</p>")
+        self.assertEqual(self.html("- a\nb"), "<ul><li>a b</li></ul>")
+        self.assertEqual(self.html("> a\nb"), "<blockquote>a b</blockquote>")
+
+    def test_nested_lists(self):
+        md = "- one\n  - one a\n  - one b\n    1. deep\n- two"
+        self.assertEqual(
+            self.html(md),
+            "<ul><li>one<ul><li>one a</li><li>one b<ol><li>deep</li></ol></li></ul></li><li>two</li></ul>",
+        )
+
+    def test_loose_lists(self):
+        self.assertEqual(self.html("- a\n\n- b"), "<ul><li><p>a</p></li><li><p>b</p></li></ul>")
+        self.assertEqual(
+            self.html("1. first\n\n   more of first\n2. second"),
+            "<ol><li><p>first</p><p>more of first</p></li><li><p>second</p></li></ol>",
+        )
+        # A blank line after a list ends it without loosening it
+        self.assertEqual(self.html("- a\n- b\n\nafter"), "<ul><li>a</li><li>b</li></ul><p>after</p>")
+
+    def test_list_start_and_markers(self):
+        self.assertEqual(self.html("3. c\n4. d"), '<ol start="3"><li>c</li><li>d</li></ol>')
+        self.assertEqual(self.html("* star\n+ plus"), "<ul><li>star</li></ul><ul><li>plus</li></ul>")
+        self.assertEqual(self.html("-x and 1.5"), "<p>-x and 1.5</p>")
+
+    def test_paragraph_interrupts(self):
+        # Only a bullet or "1." item with content starts a list mid-paragraph
+        self.assertEqual(self.html("text\n2. not a list"), "<p>text 2. not a list</p>")
+        self.assertEqual(self.html("text\n-"), "<p>text -</p>")
+        self.assertEqual(self.html("text\n- item"), "<p>text</p><ul><li>item</li></ul>")
+        self.assertEqual(self.html("text\n# Title"), "<p>text</p><h1>Title</h1>")
+
+    def test_quotes(self):
+        self.assertEqual(
+            self.html("> # Title\n> body\nlazy line\n>\n> > inner"),
+            "<blockquote><h1>Title</h1><p>body lazy line</p><blockquote>inner</blockquote></blockquote>",
+        )
+        self.assertEqual(self.html("> - a\n> - b"), "<blockquote><ul><li>a</li><li>b</li></ul></blockquote>")
+
+    def test_fences_are_kept_exactly(self):
+        code = "def f():\n\n    return '# not a heading'\n\n\n- nor a list  \n"
+        self.assertEqual(
+            self.html(f"```python extra\n{code}```\nafter"),
+            f'<pre><code class="language-python">{code}</code></pre><p>after</p>',
+        )
+        # Content loses only the fence's own indentation, and a longer
+        # closing fence is still a close
+        self.assertEqual(self.html("  ~~~\n  a\n    b\n c\n  ~~~~"), "<pre><code>a\n  b\nc\n</code></pre>")
+        # An unclosed fence runs to the end of the document
+        self.assertEqual(self.html("```\ncode\n\n"), "<pre><code>code\n\n</code></pre>")
 
-    This is another paragraph with _italic_ text and `code` here
-    This is the same paragraph on a new line
+    def test_fence_in_list_item(self):
+        self.assertEqual(
+            self.html("- item\n\n  ```\n  code\n\n    more\n  ```\n- next"),
+            "<ul><li><p>item</p><pre><code>code\n\n  more\n</code></pre></li><li><p>next</p></li></ul>",
+        )
 
-    - This is a list
-    - with items
-    """
-        blocks = markdown_to_blocks(md)
+    def test_indented_code(self):
         self.assertEqual(
-            blocks,
-            [
-                "This is **bolded** paragraph",
-                "This is another paragraph with _italic_ text and `code` here\nThis is the same paragraph on a new line",
-                "- This is a list\n- with items",
-            ],
+            self.html("para\n\n    code\n\n      more\n\nafter"),
+            "<p>para</p><pre><code>code\n\n  more\n</code></pre><p>after</p>",
         )
 
-class TestBlockTypeIdentification(unittest.TestCase):
+    def test_code_lines_are_not_copied(self):
+        lines = ["```", "first", "second", "```"]
+        code = next(iter_block_nodes(lines)).children[0]
+        self.assertIs(code.lines[0], lines[1])
+        self.assertIs(code.lines[1], lines[2])
+
+    def test_code_lines_from_a_file(self):
+        # Lines read from a file end in a newline, so each one is copied
+        # once, without it
+        markdown = "```\nfirst\r\nsecond\n```\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, "w", newline="") as f:
+                f.write(markdown)
+            with open(path) as f:
+                code = next(iter_block_nodes(f)).children[0]
+        self.assertEqual(code.lines, ["first", "second"])
+        self.assertEqual(code.to_html(), markdown_to_html_node(markdown).children[0].children[0].to_html())
+
+    def test_streams_blocks_as_they_close(self):
+        lines = iter(["# Title\n", "```\n", "code\n", "```\n", "- a\n", "- b\n"])
+        nodes = iter_block_nodes(lines)
+        self.assertEqual(next(nodes).to_html(), "<h1>Title</h1>")
+        self.assertEqual(next(nodes).to_html(), "<pre><code>code\n</code></pre>")
+        # Nothing past the closing fence has been read yet
+        self.assertEqual(next(lines), "- a\n")
+
     
     '''def test_heading(self):
         # Test valid headings
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import main
+from cache import RenderCache
+from metadata import DocumentMetadata
+from template import CompiledTemplate
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.cache = RenderCache(os.path.join(self.root, "cache"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        key = self.cache.key("# Title\n\ntext")
+        self.assertIsNone(self.cache.get(key))
+        metadata = DocumentMetadata("Title", [(1, "Title")], 2, ["/"], [])
+        self.cache.put(key, metadata, "<div></div>")
+        self.assertEqual(self.cache.get(key), (metadata, "<div></div>"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_failed_put_leaves_no_entry(self):
+        key = self.cache.key("text")
+        with self.assertRaises(TypeError):
+            self.cache.put(key, DocumentMetadata("Title", links={"not", "json"}), "<div></div>")
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(os.listdir(os.path.join(self.cache.directory, key[:2])), [])
+
+    def test_key_depends_on_prefix(self):
+        self.assertNotEqual(self.cache.key("same", ""), self.cache.key("same", "/site"))
+        self.assertEqual(self.cache.key("same", "/site"), self.cache.key("same", "/site"))
+
+    def test_key_depends_on_parser_version(self):
+        key = self.cache.key("- a\n  - nested")
+        with mock.patch("cache.PARSER_VERSION", -1):
+            self.assertNotEqual(self.cache.key("- a\n  - nested"), key)
+
+    def test_prune_evicts_least_recently_used(self):
+        keys = [self.cache.key(str(i)) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, DocumentMetadata("t"), "x" * 100)
+            stamp = time.time() - 100 + i
+            os.utime(self.cache._path(key), (stamp, stamp))
+        self.cache.get(keys[0])  # a hit makes the oldest entry the newest
+        entry_size = os.path.getsize(self.cache._path(keys[0]))
+        self.cache.max_bytes = entry_size * 2
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_write_page_hit_skips_parsing(self):
+        source = os.path.join(self.root, "index.md")
+        dest = os.path.join(self.root, "index.html")
+        with open(source, "w") as f:
+            f.write("# Cached\n\n[home](/)")
+        template = CompiledTemplate("<title>{{ Title }}</title>{{ Content }}")
+        main.write_page(source, template, dest, "/site", self.cache)
+        with open(dest) as f:
+            first = f.read()
+        os.remove(dest)
+        with mock.patch.object(main, "parse_document", side_effect=AssertionError):
+            main.write_page(source, template, dest, "/site", self.cache)
+        with open(dest) as f:
+            self.assertEqual(f.read(), first)
+        self.assertIn('href="/site/"', first)
+
+
+if __name__ == "__main__":
+    unittest.main()
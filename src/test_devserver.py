@@ -0,0 +1,120 @@
+import os
+import tempfile
+import threading
+import unittest
+import urllib.request
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import fixtures
+from devserver import SiteWatcher, make_server
+from fixtures import SiteTestCase, read
+from main import discover_pages
+
+
+def write(path, text):
+    fixtures.write(path, text)
+    # Make sure the change is visible even on coarse mtime filesystems
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+class TestSiteWatcher(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        write(os.path.join(self.static, "index.css"), "a {}")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nhome")
+        write(os.path.join(self.content, "about", "index.md"), "# About\n\nabout")
+        self.watcher = SiteWatcher(self.static, self.content, self.template, self.docs, "/")
+
+    def poll(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            self.watcher.poll()
+        return out.getvalue()
+
+    def test_no_changes(self):
+        self.assertEqual(self.poll(), "")
+
+    def test_only_touched_page_is_rendered(self):
+        write(os.path.join(self.content, "about", "index.md"), "# About\n\nnew text")
+        log = self.poll()
+        self.assertIn("about", log)
+        self.assertNotIn(os.path.join(self.content, "index.md"), log)
+        self.assertIn("<p>new text</p>", read(os.path.join(self.docs, "about", "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_template_change_renders_every_page(self):
+        write(self.template, "<h2>{{ Title }}</h2>{{ Content }}")
+        self.poll()
+        self.assertTrue(read(os.path.join(self.docs, "index.html")).startswith("<h2>Home"))
+        self.assertTrue(read(os.path.join(self.docs, "about", "index.html")).startswith("<h2>About"))
+
+    def test_section_template_change_renders_its_pages(self):
+        section_template = os.path.join(self.content, "about", "_template.html")
+        write(section_template, "<h3>{{ Title }}</h3>{{ Content }}")
+        self.poll()
+        self.assertTrue(read(os.path.join(self.docs, "about", "index.html")).startswith("<h3>About"))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "about", "_template.html")))
+
+        os.remove(section_template)
+        self.poll()
+        self.assertTrue(read(os.path.join(self.docs, "about", "index.html")).startswith("<h1>About"))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_dependencies_rebuilt_only_on_structure_changes(self):
+        with mock.patch("devserver.discover_pages", wraps=discover_pages) as discover:
+            self.poll()
+            write(os.path.join(self.content, "index.md"), "# Home\n\nedited")
+            self.poll()
+            discover.assert_not_called()
+
+            write(os.path.join(self.content, "about", "team.md"), "# Team")
+            self.poll()
+            self.assertEqual(discover.call_count, 1)
+            self.assertIn("<h1>Team</h1>", read(os.path.join(self.docs, "about", "team.html")))
+
+            # A template that starts including a file picks up edits to it
+            header = os.path.join(self.root, "header.html")
+            write(header, "<header>one</header>")
+            write(self.template, "{{> header.html }}{{ Content }}")
+            self.poll()
+            self.assertEqual(discover.call_count, 2)
+            write(header, "<header>two</header>")
+            self.poll()
+            self.assertEqual(discover.call_count, 3)
+        self.assertTrue(read(os.path.join(self.docs, "index.html")).startswith("<header>two"))
+
+    def test_static_copy_and_removal(self):
+        write(os.path.join(self.static, "index.css"), "b {}")
+        self.poll()
+        self.assertEqual(read(os.path.join(self.docs, "index.css")), "b {}")
+        os.remove(os.path.join(self.static, "index.css"))
+        self.poll()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css")))
+
+    def test_broken_page_keeps_watching(self):
+        write(os.path.join(self.content, "index.md"), "no title yet")
+        self.assertIn("error", self.poll())
+
+
+class TestServer(unittest.TestCase):
+    def test_serves_docs(self):
+        with tempfile.TemporaryDirectory() as docs:
+            write(os.path.join(docs, "index.html"), "<p>hi</p>")
+            httpd = make_server(docs, 0)
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+            try:
+                url = f"http://localhost:{httpd.server_address[1]}/"
+                with urllib.request.urlopen(url) as response:
+                    self.assertEqual(response.read(), b"<p>hi</p>")
+            finally:
+                httpd.shutdown()
+                httpd.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,8 @@
+import io
 import unittest
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from unittest import mock
+
+from htmlnode import HTMLNode, LeafNode, ParentNode, VerbatimNode
 from inline_markdown import split_nodes_delimiter
 from textnode import *
 
@@ -102,6 +105,94 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "one "), LeafNode("b", "two")]),
+                LeafNode("a", "three", {"href": "/x"}),
+            ],
+            {"class": "body"},
+        )
+        chunks = list(node.iter_html())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(
+            "".join(chunks),
+            '<div class="body"><p>one <b>two</b></p><a href="/x">three</a></div>',
+        )
+
+    def test_write_to(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, "item")])])
+        out = io.StringIO()
+        node.write_to(out)
+        self.assertEqual(out.getvalue(), "<ul><li>item</li></ul>")
+
+    def test_to_html_deep_nesting(self):
+        node = LeafNode(None, "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), 5000 * len("<span></span>") + len("deep"))
+
+    def test_url_prefix(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("a", "home", {"href": "/"}),
+                LeafNode("a", "out", {"href": "https://boot.dev"}),
+                LeafNode("img", "", {"src": "/images/a.png", "alt": "/a"}),
+            ],
+        )
+        self.assertEqual(
+            node.to_html("/site"),
+            '<p><a href="/site/">home</a><a href="https://boot.dev">out</a>'
+            '<img src="/site/images/a.png" alt="/a"></img></p>',
+        )
+
+    def test_escaping_by_context(self):
+        self.assertEqual(LeafNode(None, "plain").to_html(), "plain")
+        self.assertEqual(
+            LeafNode("p", "1 < 2 & 3 &copy; &#169; &#xA9; &nope").to_html(),
+            "<p>1 &lt; 2 &amp; 3 &copy; &#169; &#xA9; &amp;nope</p>",
+        )
+        self.assertEqual(LeafNode("code", "&copy; <b>").to_html(), "<code>&amp;copy; &lt;b&gt;</code>")
+        self.assertEqual(
+            LeafNode("img", "", {"src": "/a.png", "alt": 'say "hi" & <wave>'}).to_html("/site"),
+            '<img src="/site/a.png" alt="say &quot;hi&quot; &amp; &lt;wave&gt;"></img>',
+        )
+
+    def test_non_str_values(self):
+        self.assertEqual(HTMLNode("img", None, None, {"width": 100}).props_to_html(), ' width="100"')
+        self.assertEqual(
+            LeafNode("td", 3.5, {"colspan": 2, "href": None}).to_html("/site"),
+            '<td colspan="2" href="None">3.5</td>',
+        )
+
+    def test_iter_html_invalid_child(self):
+        node = ParentNode("div", [ParentNode("p", None)])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+    def test_verbatim(self):
+        lines = ["if a < b && c:", "", "    return '&amp;'"]
+        node = ParentNode("pre", [VerbatimNode("code", lines, {"class": "language-py"})])
+        html = (
+            '<pre><code class="language-py">if a &lt; b &amp;&amp; c:\n\n'
+            "    return '&amp;amp;'\n</code></pre>"
+        )
+        self.assertEqual(node.to_html(), html)
+        self.assertEqual(node.children[0].text(), "\n".join(lines) + "\n")
+        self.assertEqual(VerbatimNode("code", []).to_html(), "<code></code>")
+
+    def test_verbatim_writes_in_batches(self):
+        lines = [f"line {i}" for i in range(10)]
+        with mock.patch("htmlnode.VERBATIM_BATCH_LINES", 4):
+            chunks = list(VerbatimNode("code", lines).iter_html())
+        self.assertEqual(chunks[1], "line 0\nline 1\nline 2\nline 3")
+        self.assertEqual(len(chunks), 2 + 3 * 2)
+        self.assertEqual("".join(chunks), "<code>" + "\n".join(lines) + "\n</code>")
+
     
 
 '''node = LeafNode("p", "This is a paragraph of text.")
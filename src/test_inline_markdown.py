@@ -172,6 +172,98 @@ class TestInlineMarkdown(unittest.TestCase):
             nodes,
         )
 
+    def test_text_to_textnodes_many_links(self):
+        nodes = text_to_textnodes(
+            "a [one](https://one.dev) b [two](https://two.dev) c ![three](/three.png)"
+        )
+        self.assertListEqual(
+            [
+                TextNode("a ", TextType.TEXT),
+                TextNode("one", TextType.LINK, "https://one.dev"),
+                TextNode(" b ", TextType.TEXT),
+                TextNode("two", TextType.LINK, "https://two.dev"),
+                TextNode(" c ", TextType.TEXT),
+                TextNode("three", TextType.IMAGE, "/three.png"),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_literal_spans(self):
+        nodes = text_to_textnodes("`a*b_c` and [snake](https://x.dev/a_b_c)")
+        self.assertListEqual(
+            [
+                TextNode("a*b_c", TextType.CODE),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("snake", TextType.LINK, "https://x.dev/a_b_c"),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_unclosed(self):
+        self.assertListEqual(
+            [TextNode("this **is not closed", TextType.TEXT)],
+            text_to_textnodes("this **is not closed"),
+        )
+        self.assertListEqual(
+            [TextNode("a * b and `tick", TextType.TEXT)],
+            text_to_textnodes("a * b and `tick"),
+        )
+
+    def test_text_to_textnodes_intraword_underscore(self):
+        self.assertListEqual(
+            [
+                TextNode("call snake_case_name with ", TextType.TEXT),
+                TextNode("care", TextType.ITALIC),
+            ],
+            text_to_textnodes("call snake_case_name with _care_"),
+        )
+
+    def test_text_to_textnodes_nested(self):
+        self.assertListEqual(
+            [
+                TextNode(None, TextType.ITALIC, children=[
+                    TextNode("a ", TextType.TEXT),
+                    TextNode("b", TextType.BOLD),
+                    TextNode(" c", TextType.TEXT),
+                ]),
+            ],
+            text_to_textnodes("*a **b** c*"),
+        )
+        self.assertListEqual(
+            [TextNode(None, TextType.ITALIC, children=[TextNode("x", TextType.BOLD)])],
+            text_to_textnodes("***x***"),
+        )
+
+    def test_text_to_textnodes_leftover_delimiters(self):
+        self.assertListEqual(
+            [TextNode("*", TextType.TEXT), TextNode("foo", TextType.ITALIC)],
+            text_to_textnodes("**foo*"),
+        )
+
+    def test_text_to_textnodes_code_span_lengths(self):
+        self.assertListEqual(
+            [TextNode("a ` b", TextType.CODE), TextNode(" and `c", TextType.TEXT)],
+            text_to_textnodes("``a ` b`` and `c"),
+        )
+
+    def test_text_to_textnodes_pathological(self):
+        text = "*a " * 20000 + "_b " * 20000 + "[" * 20000 + "`" * 50
+        nodes = text_to_textnodes(text)
+        self.assertListEqual([TextNode(text, TextType.TEXT)], nodes)
+
+    def test_split_nodes_link_multiple(self):
+        node = TextNode("a [x](u) b [y](v) c", TextType.TEXT)
+        self.assertListEqual(
+            [
+                TextNode("a ", TextType.TEXT),
+                TextNode("x", TextType.LINK, "u"),
+                TextNode(" b ", TextType.TEXT),
+                TextNode("y", TextType.LINK, "v"),
+                TextNode(" c", TextType.TEXT),
+            ],
+            split_nodes_link([node]),
+        )
+
 '''text = "This is text with a ![rick roll](https://i.imgur.com/aKaOqIh.gif) and ![obi wan](https://i.imgur.com/fJRm4Vk.jpeg)"
 print(extract_markdown_images(text))
 text = "This is text with a link [to boot dev](https://www.boot.dev) and [to youtube](https://www.youtube.com/@bootdotdev)"
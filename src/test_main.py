@@ -0,0 +1,92 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from fixtures import SiteTestCase, read, write
+from main import discover_pages, generate_pages_recursive, write_page
+from template import CompiledTemplate
+
+
+def read_tree(root):
+    outputs = {}
+    for dir_path, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dir_path, filename)
+            outputs[os.path.relpath(path, root)] = read(path)
+    return outputs
+
+
+class TestParallelPages(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(12):
+            write(
+                os.path.join(self.content, f"section{i % 3}", f"page{i}", "index.md"),
+                f"# Page {i}\n\nBody of **page {i}** with a [link](/page{i}).",
+            )
+
+    def build(self, dest, jobs):
+        out = StringIO()
+        with redirect_stdout(out):
+            generate_pages_recursive(self.content, self.template, dest, "/", jobs)
+        return out.getvalue()
+
+    def test_discover_pages_is_sorted(self):
+        pages = discover_pages(self.content, "docs")
+        self.assertEqual(len(pages), 12)
+        self.assertEqual(pages, sorted(pages))
+        self.assertTrue(all(dest.endswith(".html") for _, dest in pages))
+
+    def test_parallel_matches_serial(self):
+        serial_dest = os.path.join(self.root, "serial")
+        parallel_dest = os.path.join(self.root, "parallel")
+        serial_log = self.build(serial_dest, 1)
+        parallel_log = self.build(parallel_dest, 4)
+        self.assertEqual(read_tree(serial_dest), read_tree(parallel_dest))
+        self.assertEqual(
+            serial_log.replace(serial_dest, "<dest>"),
+            parallel_log.replace(parallel_dest, "<dest>"),
+        )
+
+
+class TestWritePage(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = os.path.join(self.root, "index.md")
+        self.dest = os.path.join(self.root, "out", "index.html")
+
+    def test_title_after_first_block(self):
+        write(self.source, "[home](/)\n\n# Late title\n\ntext")
+        template = CompiledTemplate("<title>{{ Title }}</title>{{ Content }}", "/site")
+        write_page(self.source, template, self.dest, "/site/")
+        with open(self.dest) as f:
+            self.assertEqual(
+                f.read(),
+                '<title>Late title</title><div><p><a href="/site/">home</a></p>'
+                "<h1>Late title</h1><p>text</p></div>",
+            )
+
+    def test_repeated_content_slot(self):
+        write(self.source, "# T\n\nbody")
+        write_page(self.source, CompiledTemplate("{{ Content }}|{{ Content }}"), self.dest, "/")
+        with open(self.dest) as f:
+            html = "<div><h1>T</h1><p>body</p></div>"
+            self.assertEqual(f.read(), html + "|" + html)
+
+    def test_title_is_escaped(self):
+        write(self.source, "# Q&A <live>")
+        write_page(self.source, CompiledTemplate("<title>{{ Title }}</title>"), self.dest, "/")
+        with open(self.dest) as f:
+            self.assertEqual(f.read(), "<title>Q&amp;A &lt;live&gt;</title>")
+
+    def test_missing_title(self):
+        write(self.source, "no title here")
+        with self.assertRaises(ValueError):
+            write_page(self.source, CompiledTemplate("{{ Content }}"), self.dest, "/")
+        self.assertFalse(os.path.exists(self.dest))
+
+
+if __name__ == "__main__":
+    unittest.main()
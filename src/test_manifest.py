@@ -0,0 +1,165 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from fixtures import SiteTestCase, read, write
+from main import build_incremental
+from manifest import load_manifest, save_manifest
+
+
+class TestIncrementalBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        write(self.template, "<title>{{ Title }}</title><a href=\"/\"></a>{{ Content }}")
+        write(os.path.join(self.static, "index.css"), "body {}")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nhello")
+        write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nworld")
+
+    def build(self, basepath="/"):
+        with redirect_stdout(StringIO()):
+            return build_incremental(
+                self.static, self.content, self.template, self.docs, basepath, self.manifest
+            )
+
+    def test_first_build_renders_everything(self):
+        self.assertEqual(self.build(), (2, 1, 0))
+        self.assertIn("<p>hello</p>", read(os.path.join(self.docs, "index.html")))
+        self.assertEqual(read(os.path.join(self.docs, "index.css")), "body {}")
+        manifest = load_manifest(self.manifest)
+        self.assertEqual(len(manifest["pages"]), 2)
+
+    def test_unchanged_build_does_nothing(self):
+        self.build()
+        self.assertEqual(self.build(), (0, 0, 0))
+
+    def test_only_changed_page_is_rendered(self):
+        self.build()
+        write(os.path.join(self.content, "index.md"), "# Home\n\nchanged")
+        self.assertEqual(self.build(), (1, 0, 0))
+        self.assertIn("<p>changed</p>", read(os.path.join(self.docs, "index.html")))
+
+    def test_template_or_basepath_change_renders_all(self):
+        self.build()
+        self.assertEqual(self.build("/site"), (2, 0, 0))
+        write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.build("/site"), (2, 0, 0))
+
+    def test_parser_version_change_renders_all(self):
+        self.build()
+        with mock.patch("main.PARSER_VERSION", -1):
+            self.assertEqual(self.build(), (2, 0, 0))
+            self.assertEqual(self.build(), (0, 0, 0))
+        self.assertEqual(load_manifest(self.manifest)["parser_version"], -1)
+
+    def test_manifest_without_parser_version_renders_all(self):
+        # As left by builds from before the version was recorded, whose pages
+        # came from an older parser
+        self.build()
+        manifest = load_manifest(self.manifest)
+        del manifest["parser_version"]
+        save_manifest(manifest, self.manifest)
+        self.assertEqual(self.build(), (2, 0, 0))
+
+    def test_failed_save_keeps_the_old_manifest(self):
+        self.build()
+        with self.assertRaises(TypeError):
+            save_manifest({"pages": {"index.md": {"deps": {"not", "json"}}}}, self.manifest)
+        self.assertEqual(len(load_manifest(self.manifest)["pages"]), 2)
+        self.assertEqual(
+            sorted(os.listdir(os.path.dirname(self.manifest))), ["manifest.json", "stat_index.json"]
+        )
+
+    def test_missing_output_is_regenerated(self):
+        self.build()
+        os.remove(os.path.join(self.docs, "index.html"))
+        self.assertEqual(self.build(), (1, 0, 0))
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        os.remove(os.path.join(self.static, "index.css"))
+        self.assertEqual(self.build(), (0, 0, 2))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+
+class TestDependencyGraph(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.footer = os.path.join(self.root, "footer.html")
+        self.blog_template = os.path.join(self.content, "blog", "_template.html")
+        write(self.template, "<main>{{ Content }}</main>{{> footer.html }}")
+        write(self.footer, "<footer>site</footer>")
+        os.makedirs(self.static)
+        write(self.blog_template, "<article>{{ Content }}</article>")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nhello")
+        write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nworld")
+
+    def build(self, basepath="/"):
+        out = StringIO()
+        with redirect_stdout(out):
+            result = build_incremental(
+                self.static, self.content, self.template, self.docs,
+                basepath, self.manifest, explain=True,
+            )
+        return result, out.getvalue()
+
+    def test_section_template(self):
+        self.build()
+        self.assertEqual(
+            read(os.path.join(self.docs, "index.html")),
+            "<main><div><h1>Home</h1><p>hello</p></div></main><footer>site</footer>",
+        )
+        self.assertEqual(
+            read(os.path.join(self.docs, "blog", "post", "index.html")),
+            "<article><div><h1>Post</h1><p>world</p></div></article>",
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "_template.html")))
+        manifest = load_manifest(self.manifest)
+        self.assertEqual(
+            manifest["pages"][os.path.join(self.content, "index.md")]["deps"],
+            [self.template, self.footer],
+        )
+
+    def test_include_change_renders_only_its_pages(self):
+        self.build()
+        write(self.footer, "<footer>new</footer>")
+        (rendered, _, _), log = self.build()
+        self.assertEqual(rendered, 1)
+        self.assertIn(f"index.md: {self.footer} changed", log)
+        self.assertNotIn("post", log)
+
+        write(self.blog_template, "<section>{{ Content }}</section>")
+        (rendered, _, _), log = self.build()
+        self.assertEqual(rendered, 1)
+        self.assertIn(f"post/index.md: {self.blog_template} changed", log)
+
+    def test_removing_section_template(self):
+        self.build()
+        os.remove(self.blog_template)
+        (rendered, _, _), log = self.build()
+        self.assertEqual(rendered, 1)
+        self.assertIn(f"template is now {self.template}", log)
+        self.assertTrue(read(os.path.join(self.docs, "blog", "post", "index.html")).startswith("<main>"))
+
+    def test_explain(self):
+        _, log = self.build()
+        self.assertIn("index.md: new page", log)
+        _, log = self.build("/site")
+        self.assertIn("index.md: basepath changed", log)
+        with mock.patch("main.PARSER_VERSION", -1):
+            _, log = self.build("/site")
+        self.assertIn("index.md: markdown parser changed", log)
+        self.assertIn("post/index.md: markdown parser changed", log)
+        write(os.path.join(self.content, "index.md"), "# Home\n\nchanged")
+        os.remove(os.path.join(self.docs, "blog", "post", "index.html"))
+        _, log = self.build("/site")
+        self.assertIn("index.md: source changed", log)
+        self.assertIn("post/index.md: output missing", log)
+
+
+if __name__ == "__main__":
+    unittest.main()
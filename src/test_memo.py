@@ -0,0 +1,57 @@
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+
+from block_markdown import markdown_to_html_node, set_inline_memo, inline_memo_stats
+from main import parse_args
+from memo import LRUMemo
+
+
+class TestLRUMemo(unittest.TestCase):
+    def test_counters_and_eviction(self):
+        calls = []
+
+        def square(x):
+            calls.append(x)
+            return x * x
+
+        memo = LRUMemo(square, maxsize=2)
+        self.assertEqual([memo(2), memo(3), memo(2), memo(4), memo(3)], [4, 9, 4, 16, 9])
+        # 3 was least recently used when 4 arrived, so it was evicted and recomputed
+        self.assertEqual(calls, [2, 3, 4, 3])
+        self.assertEqual(
+            memo.stats(),
+            {"hits": 1, "misses": 4, "evictions": 2, "size": 2, "maxsize": 2},
+        )
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            LRUMemo(str, maxsize=0)
+
+    def test_invalid_command_line_size(self):
+        err = StringIO()
+        with redirect_stderr(err), self.assertRaises(SystemExit):
+            parse_args(["--inline-memo", "-1"])
+        self.assertIn("--inline-memo", err.getvalue())
+        self.assertEqual(parse_args(["--inline-memo", "0"]).inline_memo, 0)
+
+
+class TestInlineMemo(unittest.TestCase):
+    def tearDown(self):
+        set_inline_memo(0)
+
+    def test_repeated_text_hits(self):
+        md = "- see [also](/x)\n- see [also](/x)\n\nsee [also](/x)"
+        expected = markdown_to_html_node(md).to_html()
+        set_inline_memo(16)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        stats = inline_memo_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+
+    def test_disabled(self):
+        set_inline_memo(0)
+        self.assertIsNone(inline_memo_stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from block_markdown import markdown_to_html_node
+from metadata import DocumentMetadata, parse_document
+
+
+class TestDocumentMetadata(unittest.TestCase):
+    def test_collected_during_parse(self):
+        markdown = (
+            "# The *Lord* of the Rings\n\n"
+            "Read [the book](/book.html) before ![the map](/map.png) and [this](https://x.dev).\n\n"
+            "## Part **one**\n\n"
+            "- a list item\n- another\n\n"
+            "```\nnot counted at all\n```\n\n"
+            "# A second top heading"
+        )
+        node, metadata = parse_document(markdown)
+        self.assertEqual(metadata.title, "The *Lord* of the Rings")
+        self.assertEqual(
+            metadata.headings,
+            [(1, "The Lord of the Rings"), (2, "Part one"), (1, "A second top heading")],
+        )
+        self.assertEqual(metadata.links, ["/book.html", "https://x.dev"])
+        self.assertEqual(metadata.images, ["/map.png"])
+        self.assertEqual(metadata.word_count, 5 + 6 + 2 + 4 + 4)
+        self.assertEqual(node.to_html(), markdown_to_html_node(markdown).to_html())
+
+    def test_no_title(self):
+        _, metadata = parse_document("## Only a subheading\n\ntext")
+        self.assertIsNone(metadata.title)
+        self.assertEqual(metadata.headings, [(2, "Only a subheading")])
+
+    def test_title_ignores_code_blocks(self):
+        _, metadata = parse_document("```\n# not a heading\n```\n\n# Real")
+        self.assertEqual(metadata.title, "Real")
+
+    def test_nested_code_is_not_counted(self):
+        _, metadata = parse_document("- item\n\n  ```\n  lots of code words\n  ```\n> quoted")
+        self.assertEqual(metadata.word_count, 2)
+
+    def test_dict_round_trip(self):
+        _, metadata = parse_document("# T\n\n## Sub\n\n[a](/a) ![b](/b.png)")
+        self.assertEqual(DocumentMetadata.from_dict(metadata.to_dict()), metadata)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from pageio import PageWriter, read_text, write_atomic
+
+
+class TestPageIO(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def test_read_text(self):
+        path = self.path("page.md")
+        with open(path, "wb") as f:
+            f.write("# Café\r\n\r\nbody\rend\n".encode("utf-8"))
+        small = read_text(path)
+        with mock.patch("pageio.MMAP_THRESHOLD", 0):
+            mapped = read_text(path)
+        with open(path, "r", encoding="utf-8") as f:
+            expected = f.read()
+        self.assertEqual(small, expected)
+        self.assertEqual(mapped, expected)
+
+        open(self.path("empty.md"), "w").close()
+        with mock.patch("pageio.MMAP_THRESHOLD", 0):
+            self.assertEqual(read_text(self.path("empty.md")), "")
+
+    def test_write_atomic(self):
+        dest = self.path("out", "index.html")
+        write_atomic(dest, lambda f: f.write("old"))
+
+        def fail(f):
+            f.write("half a pa")
+            raise RuntimeError("render failed")
+
+        with self.assertRaises(RuntimeError):
+            write_atomic(dest, fail)
+        with open(dest) as f:
+            self.assertEqual(f.read(), "old")
+        self.assertEqual(os.listdir(self.path("out")), ["index.html"])
+
+    def test_page_writer(self):
+        with PageWriter(threads=2, max_pending=1) as writer:
+            for i in range(5):
+                writer.submit(self.path("docs", f"{i}.html"), ["<p>", str(i), "</p>"])
+        for i in range(5):
+            with open(self.path("docs", f"{i}.html")) as f:
+                self.assertEqual(f.read(), f"<p>{i}</p>")
+
+    def test_page_writer_reports_errors(self):
+        open(self.path("docs"), "w").close()  # a file where a directory should be
+        writer = PageWriter()
+        writer.submit(self.path("docs", "index.html"), ["page"])
+        writer.submit(self.path("ok.html"), ["page"])
+        with self.assertRaises(OSError):
+            writer.close()
+        self.assertTrue(os.path.exists(self.path("ok.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
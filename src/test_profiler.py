@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import profiler
+from block_markdown import markdown_to_html_node
+from profiler import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def tearDown(self):
+        profiler.disable()
+
+    def test_nested_phases_are_exclusive(self):
+        prof = Profiler()
+        with prof.phase("outer"):
+            time.sleep(0.01)
+            with prof.phase("inner"):
+                time.sleep(0.02)
+        outer_seconds, outer_calls = prof.phases["outer"]
+        inner_seconds, inner_calls = prof.phases["inner"]
+        self.assertEqual((outer_calls, inner_calls), (1, 1))
+        self.assertGreaterEqual(inner_seconds, 0.02)
+        self.assertLess(outer_seconds, 0.02)
+
+    def test_page_reports(self):
+        prof = Profiler()
+        with prof.page("a.md"):
+            with prof.phase("inline"):
+                pass
+            with prof.phase("inline"):
+                pass
+        self.assertEqual(prof.pages["a.md"]["phases"]["inline"][1], 2)
+        prof.add_page("b.md", {"seconds": 1.5, "phases": {"inline": [1.0, 3]}})
+        report = prof.report()
+        self.assertEqual(report["phases"]["inline"]["calls"], 5)
+        self.assertEqual(report["pages"]["b.md"]["phases"]["inline"], {"seconds": 1.0, "calls": 3})
+        self.assertIn("b.md", prof.format_summary(top=1))
+        self.assertNotIn("a.md", prof.format_summary(top=1))
+
+    def test_disabled_hooks_are_shared_no_ops(self):
+        profiler.disable()
+        self.assertIs(profiler.phase("inline"), profiler.phase("build"))
+        self.assertIsNone(profiler.active())
+
+    def test_parser_is_instrumented(self):
+        prof = profiler.enable()
+        markdown_to_html_node("# Title\n\nsome *text*\n\n- a\n- b")
+        # The heading, the paragraph, each item's text and the list itself
+        self.assertEqual(prof.phases["build"][1], 5)
+        self.assertEqual(prof.phases["inline"][1], 4)
+
+    def test_write_json(self):
+        prof = Profiler()
+        with prof.phase("discover"):
+            pass
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "out", "profile.json")
+            prof.write_json(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)["phases"]["discover"]["calls"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+from batch import render
+from service import RenderError, RenderService, _handle, _render_batch, serve
+
+
+class TestRenderService(unittest.TestCase):
+    def run_with_service(self, body, **kwargs):
+        async def run():
+            async with RenderService(jobs=1, **kwargs) as service:
+                return await body(service)
+        return asyncio.run(run())
+
+    def test_concurrent_requests_match_render(self):
+        documents = [f"# Title {i}\n\nsome **bold** text {i}" for i in range(50)]
+
+        async def body(service):
+            return await asyncio.gather(*(service.render(md) for md in documents))
+
+        self.assertEqual(self.run_with_service(body, batch_size=8), [render(md) for md in documents])
+
+    def test_invalid_markdown_fails_only_its_request(self):
+        def fail_on_bad(markdown, url_prefix):
+            if markdown == "bad":
+                raise ValueError("rejected")
+            return render(markdown, url_prefix)
+
+        with mock.patch("service.render", side_effect=fail_on_bad):
+            results = _render_batch([("fine", ""), ("bad", ""), ("also fine", "")])
+        self.assertEqual(
+            results, [(render("fine"), None), (None, "rejected"), (render("also fine"), None)]
+        )
+
+    def test_deadline(self):
+        async def body(service):
+            with self.assertRaises(TimeoutError):
+                await service.render("x " * 200000, timeout=0.001)
+            # The service keeps working after a request gives up
+            return await service.render("after")
+
+        self.assertEqual(self.run_with_service(body), render("after"))
+
+    def test_backpressure_bounds_the_queue(self):
+        async def body(service):
+            results = await asyncio.gather(*(service.render(f"doc {i}") for i in range(20)))
+            return results, service._queue.maxsize
+
+        results, maxsize = self.run_with_service(body, max_pending=2)
+        self.assertEqual(maxsize, 2)
+        self.assertEqual(results, [render(f"doc {i}") for i in range(20)])
+
+    def test_slots_follow_jobs(self):
+        async def run():
+            service = RenderService(jobs=3, executor=mock.Mock(spec=["submit", "shutdown"]))
+            return service.jobs, service._slots._value
+
+        self.assertEqual(asyncio.run(run()), (3, 6))
+
+    def test_broken_pool(self):
+        class BrokenExecutor:
+            # Starts fine, then every batch fails as if a worker had died
+            def submit(self, fn, requests):
+                future = Future()
+                if requests:
+                    future.set_exception(BrokenProcessPool("a worker died"))
+                else:
+                    future.set_result([])
+                return future
+
+        async def run():
+            async with RenderService(jobs=3, executor=BrokenExecutor()) as service:
+                with self.assertRaises(RenderError):
+                    await service.render("doc")
+                return await _handle(service, "POST", "/render", {}, b"doc")
+
+        status, content = asyncio.run(run())
+        self.assertEqual(status, 500)
+        self.assertIn("a worker died", content)
+
+
+class TestHTTPEndpoint(unittest.TestCase):
+    def test_render_over_http(self):
+        async def request(port, raw):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw)
+            response = await reader.read()
+            writer.close()
+            return response
+
+        async def run():
+            async with RenderService(jobs=1) as service:
+                started = asyncio.get_running_loop().create_future()
+                server_task = asyncio.create_task(
+                    serve("127.0.0.1", 0, service, lambda server: started.set_result(server))
+                )
+                server = await started
+                port = server.sockets[0].getsockname()[1]
+                body = b"[home](/index.html)"
+                ok = await request(port, (
+                    b"POST /render?prefix=/site HTTP/1.1\r\nConnection: close\r\n"
+                    b"Content-Length: %d\r\n\r\n%s" % (len(body), body)
+                ))
+                missing = await request(port, b"GET /nope HTTP/1.0\r\n\r\n")
+                server_task.cancel()
+                return ok, missing
+
+        ok, missing = asyncio.run(run())
+        self.assertTrue(ok.startswith(b"HTTP/1.1 200 OK\r\n"))
+        self.assertTrue(ok.endswith(b'<div><p><a href="/site/index.html">home</a></p></div>'))
+        self.assertTrue(missing.startswith(b"HTTP/1.1 404"))
+
+
+if __name__ == "__main__":
+    unittest.main()
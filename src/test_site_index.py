@@ -0,0 +1,116 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from fixtures import SiteTestCase, write
+from main import build_incremental
+from manifest import load_manifest
+from metadata import DocumentMetadata
+from site_index import SiteIndex, internal_target, page_url, render_feed
+
+
+def page(url, title, links=(), images=(), mtime=0):
+    metadata = DocumentMetadata(title, links=list(links), images=list(images))
+    return (url, f"content{url}index.md", mtime, metadata)
+
+
+class TestSiteIndex(unittest.TestCase):
+    def test_page_url(self):
+        self.assertEqual(page_url("docs/index.html", "docs"), "/")
+        self.assertEqual(page_url("docs/blog/post/index.html", "docs"), "/blog/post/")
+        self.assertEqual(page_url("docs/about.html", "docs"), "/about.html")
+
+    def test_internal_target(self):
+        self.assertEqual(internal_target("/blog/post/", "/"), "/")
+        self.assertEqual(internal_target("/blog/post/", "../other/#top"), "/blog/other/")
+        self.assertEqual(internal_target("/blog/post/", "img.png?v=2"), "/blog/post/img.png")
+        self.assertIsNone(internal_target("/", "https://example.com/"))
+        self.assertIsNone(internal_target("/", "mailto:me@example.com"))
+        self.assertIsNone(internal_target("/", "#section"))
+
+    def test_broken_links(self):
+        index = SiteIndex(
+            [
+                page("/", "Home", links=["/blog/post/", "/blog/post", "/missing/"]),
+                page("/blog/post/", "Post", links=["../../"], images=["/images/a.png", "b.png"]),
+            ],
+            ["images/a.png"],
+        )
+        self.assertEqual(
+            index.broken_links(),
+            [("content/index.md", "/missing/"), ("content/blog/post/index.md", "b.png")],
+        )
+
+    def test_feed(self):
+        index = SiteIndex([
+            page("/", "Home"),
+            page("/blog/", "The Blog"),
+            page("/blog/old/", "Old & busted", mtime=1_000_000_000_000_000_000),
+            page("/blog/new/", "New", mtime=2_000_000_000_000_000_000),
+        ])
+        feed = render_feed(index, "https://example.com/site")
+        self.assertIn("<title>The Blog</title>", feed)
+        self.assertIn('rel="self" href="https://example.com/site/blog/atom.xml"', feed)
+        self.assertLess(feed.index("<title>New</title>"), feed.index("<title>Old &amp; busted</title>"))
+        self.assertIn("<updated>2033-05-18T03:33:20Z</updated>", feed.split("<entry>")[0])
+        self.assertIsNone(render_feed(SiteIndex([page("/", "Home")]), ""))
+
+
+class TestBuildIndex(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        write(self.template, "{{ Content }}")
+        write(os.path.join(self.static, "logo.png"), "png")
+        write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post/) ![](/logo.png)")
+        write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\n[gone](/gone/)")
+
+    def build(self, site_url="https://example.com"):
+        out = StringIO()
+        with redirect_stdout(out):
+            build_incremental(
+                self.static, self.content, self.template, self.docs, "/site",
+                self.manifest, site_url=site_url,
+            )
+        return out.getvalue()
+
+    def test_index_survives_incremental_builds(self):
+        log = self.build()
+        self.assertIn("blog/post/index.md: broken link /gone/", log)
+        with open(os.path.join(self.docs, "sitemap.xml")) as f:
+            self.assertIn("<loc>https://example.com/site/blog/post/</loc>", f.read())
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "blog", "atom.xml")))
+
+        # Only the home page is rendered again, but the index still knows the post
+        write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post/)")
+        log = self.build()
+        self.assertIn("1 pages rendered", log)
+        self.assertIn("broken link /gone/", log)
+        pages = load_manifest(self.manifest)["pages"]
+        self.assertEqual(
+            pages[os.path.join(self.content, "blog", "post", "index.md")]["metadata"]["links"],
+            ["/gone/"],
+        )
+
+    def test_no_site_url(self):
+        self.build()
+        log = self.build(site_url="")
+        self.assertIn("sitemap.xml and the blog feed were not written", log)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "sitemap.xml")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "atom.xml")))
+
+    def test_broken_links_report(self):
+        report = os.path.join(self.root, ".build", "broken_links.txt")
+        self.build()
+        with open(report) as f:
+            self.assertEqual(
+                f.read(),
+                f"{os.path.join(self.content, 'blog', 'post', 'index.md')}: broken link /gone/\n",
+            )
+        write(os.path.join(self.content, "blog", "post", "index.md"), "# Post")
+        self.build()
+        self.assertFalse(os.path.exists(report))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import time
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from fixtures import SiteTestCase, read, write
+from main import build_incremental, collect_files
+from statindex import StatIndex
+
+
+def age(*paths):
+    # Back-date paths past the racy window, as if written a while ago
+    past = time.time_ns() - 60 * 1_000_000_000
+    for path in paths:
+        os.utime(path, ns=(past, past))
+
+
+class TestStatIndex(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index_path = os.path.join(self.root, ".build", "stat_index.json")
+        self.blog = os.path.join(self.content, "blog")
+        write(os.path.join(self.content, "index.md"), "# Home")
+        write(os.path.join(self.blog, "post.md"), "# Post")
+        age(os.path.join(self.content, "index.md"), os.path.join(self.blog, "post.md"),
+            self.blog, self.content)
+
+    def walk(self):
+        index = StatIndex(self.index_path)
+        files = collect_files(self.content, index)
+        index.save()
+        return index, files
+
+    def test_unchanged_directories_are_not_listed(self):
+        first, files = self.walk()
+        self.assertEqual((first.listed, first.reused), (2, 0))
+        second, again = self.walk()
+        self.assertEqual((second.listed, second.reused), (0, 2))
+        self.assertEqual(again, files)
+
+        # A new entry moves its directory's mtime, and only that one is listed
+        write(os.path.join(self.blog, "new.md"), "# New")
+        age(self.blog)
+        third, files = self.walk()
+        self.assertEqual((third.listed, third.reused), (1, 1))
+        self.assertIn(os.path.join(self.blog, "new.md"), files)
+
+    def test_recent_listings_are_not_trusted(self):
+        os.utime(self.blog)  # just changed
+        self.walk()
+        second, _ = self.walk()
+        self.assertEqual((second.listed, second.reused), (1, 1))
+
+    def test_hashes_are_reused(self):
+        path = os.path.join(self.blog, "post.md")
+        index = StatIndex(self.index_path)
+        digest = index.hash_file(path)
+        index.save()
+        with mock.patch("statindex.hash_file") as hash_file:
+            self.assertEqual(StatIndex(self.index_path).hash_file(path), digest)
+            hash_file.assert_not_called()
+        write(path, "# Post, edited")
+        age(path)
+        self.assertNotEqual(StatIndex(self.index_path).hash_file(path), digest)
+
+    def test_unreadable_index_starts_empty(self):
+        write(self.index_path, "{not json")
+        index, files = self.walk()
+        self.assertEqual(index.listed, 2)
+        self.assertEqual(len(files), 2)
+
+    def test_build_uses_index(self):
+        write(self.template, "{{ Content }}")
+        write(os.path.join(self.blog, "_template.html"), "<main>{{ Content }}</main>")
+        write(os.path.join(self.static, "logo.png"), "png")
+        age(self.blog, self.static)
+
+        def build():
+            with redirect_stdout(StringIO()):
+                return build_incremental(
+                    self.static, self.content, self.template, self.docs, "/", self.manifest
+                )
+
+        self.assertEqual(build(), (2, 1, 0))
+        self.assertTrue(os.path.exists(self.index_path))
+        self.assertEqual(build(), (0, 0, 0))
+        self.assertEqual(
+            read(os.path.join(self.docs, "blog", "post.html")), "<main><div><h1>Post</h1></div></main>"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
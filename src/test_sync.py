@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from fixtures import SiteTestCase, read_bytes, write
+from sync import copy_file, sync_tree, _copy_data
+
+
+class TestSyncTree(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = self.static
+        self.dest = self.docs
+        write(os.path.join(self.source, "index.css"), b"body {}", 10**18)
+        write(os.path.join(self.source, "images", "a.png"), b"\x89PNG" * 1000, 10**18)
+    def test_copies_once(self):
+        entries, copied, removed = sync_tree(self.source, self.dest, {})
+        self.assertEqual((copied, removed), (2, 0))
+        self.assertEqual(read_bytes(os.path.join(self.dest, "images", "a.png")), b"\x89PNG" * 1000)
+        _, copied, removed = sync_tree(self.source, self.dest, entries)
+        self.assertEqual((copied, removed), (0, 0))
+
+    def test_changed_file_is_copied(self):
+        entries, _, _ = sync_tree(self.source, self.dest, {})
+        write(os.path.join(self.source, "index.css"), b"body { margin: 0 }")
+        _, copied, _ = sync_tree(self.source, self.dest, entries)
+        self.assertEqual(copied, 1)
+        self.assertEqual(read_bytes(os.path.join(self.dest, "index.css")), b"body { margin: 0 }")
+
+    def test_removed_file_is_pruned(self):
+        entries, _, _ = sync_tree(self.source, self.dest, {})
+        write(os.path.join(self.dest, "page.html"), b"generated page")
+        os.remove(os.path.join(self.source, "images", "a.png"))
+        _, copied, removed = sync_tree(self.source, self.dest, entries)
+        self.assertEqual((copied, removed), (0, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "page.html")))
+
+    def test_checksum_skips_touched_file(self):
+        entries, _, _ = sync_tree(self.source, self.dest, {}, checksum=True)
+        os.utime(os.path.join(self.source, "index.css"), ns=(2 * 10**18, 2 * 10**18))
+        _, copied, _ = sync_tree(self.source, self.dest, entries, checksum=True)
+        self.assertEqual(copied, 0)
+        self.assertEqual(os.stat(os.path.join(self.dest, "index.css")).st_mtime_ns, 2 * 10**18)
+
+    def test_hardlinks(self):
+        sync_tree(self.source, self.dest, {}, link=True)
+        source_stat = os.stat(os.path.join(self.source, "index.css"))
+        dest_stat = os.stat(os.path.join(self.dest, "index.css"))
+        self.assertEqual(source_stat.st_ino, dest_stat.st_ino)
+
+
+class TestCopyFile(unittest.TestCase):
+    def test_copy_preserves_bytes_and_mtime(self):
+        with tempfile.TemporaryDirectory() as root:
+            source = os.path.join(root, "big.bin")
+            data = os.urandom(3 * 1024 * 1024 + 17)
+            write(source, data, 10**18)
+            dest = os.path.join(root, "out", "big.bin")
+            method = copy_file(source, dest)
+            self.assertIn(method, ("reflink", "copy_file_range", "sendfile", "copy"))
+            self.assertEqual(read_bytes(dest), data)
+            self.assertEqual(os.stat(dest).st_mtime_ns, 10**18)
+            self.assertEqual(os.listdir(os.path.join(root, "out")), ["big.bin"])
+
+    def test_copy_data_fallbacks(self):
+        with tempfile.TemporaryDirectory() as root:
+            source = os.path.join(root, "src.bin")
+            data = os.urandom(100000)
+            write(source, data)
+            dest = os.path.join(root, "dest.bin")
+            with open(source, "rb") as fsrc, open(dest, "wb") as fdst:
+                _copy_data(fsrc, fdst)
+            self.assertEqual(read_bytes(dest), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
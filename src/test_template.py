@@ -0,0 +1,85 @@
+import io
+import os
+import tempfile
+import unittest
+
+from template import CompiledTemplate, load_template, rebase_urls, url_prefix
+
+
+class TestTemplate(unittest.TestCase):
+    def render(self, template, values):
+        out = io.StringIO()
+        template.render_to(out, values)
+        return out.getvalue()
+
+    def test_slots(self):
+        template = CompiledTemplate("<title>{{ Title }}</title><body>{{Content}}</body>")
+        self.assertEqual(template.slot_count("Content"), 1)
+        html = self.render(
+            template, {"Title": "Hi", "Content": lambda file: file.write("<p>x</p>")}
+        )
+        self.assertEqual(html, "<title>Hi</title><body><p>x</p></body>")
+
+    def test_unknown_slot_is_kept(self):
+        template = CompiledTemplate("{{ Title }} {{ Footer }}")
+        self.assertEqual(self.render(template, {"Title": "T"}), "T {{ Footer }}")
+
+    def test_static_urls_rebased_once(self):
+        template = CompiledTemplate(
+            '<link href="/index.css"><script src="//cdn.dev/x.js"></script>{{ Content }}',
+            "/site",
+        )
+        html = self.render(template, {"Content": 'href="/not-rewritten"'})
+        self.assertEqual(
+            html,
+            '<link href="/site/index.css"><script src="//cdn.dev/x.js"></script>href="/not-rewritten"',
+        )
+
+    def test_url_prefix(self):
+        self.assertEqual(url_prefix("/"), "")
+        self.assertEqual(url_prefix("/markdown_parser/"), "/markdown_parser")
+        self.assertEqual(rebase_urls('<img src="/a.png">', ""), '<img src="/a.png">')
+
+    def test_load_template_cache(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            with open(path, "w") as f:
+                f.write("one {{ Content }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            with open(path, "w") as f:
+                f.write("two, longer {{ Content }}")
+            second = load_template(path)
+            self.assertIsNot(second, first)
+            self.assertEqual(second.statics[0], "two, longer ")
+
+    def test_includes(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            nav = os.path.join(root, "partials", "nav.html")
+            os.makedirs(os.path.dirname(nav))
+            with open(path, "w") as f:
+                f.write('{{> partials/nav.html }}{{ Content }}{{>partials/nav.html}}')
+            with open(nav, "w") as f:
+                f.write('<a href="/">{{ Title }}</a>')
+            template = load_template(path, "/site")
+            self.assertEqual(template.dependencies, [path, nav])
+            html = self.render(template, {"Title": "T", "Content": "c"})
+            self.assertEqual(html, '<a href="/site/">T</a>c<a href="/site/">T</a>')
+            # Editing only the include recompiles the template
+            with open(nav, "w") as f:
+                f.write("<nav>{{ Title }}</nav>")
+            html = self.render(load_template(path, "/site"), {"Title": "T", "Content": "c"})
+            self.assertEqual(html, "<nav>T</nav>c<nav>T</nav>")
+
+    def test_include_cycle(self):
+        with tempfile.TemporaryDirectory() as root:
+            for name, other in (("a.html", "b.html"), ("b.html", "a.html")):
+                with open(os.path.join(root, name), "w") as f:
+                    f.write("{{> %s }}" % other)
+            with self.assertRaises(ValueError):
+                load_template(os.path.join(root, "a.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
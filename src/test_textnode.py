@@ -51,4 +51,28 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         node = TextNode("This is bold", TextType.BOLD)
         html_node = text_node_to_html_node(node)
         self.assertEqual(html_node.tag, "b")
-        self.assertEqual(html_node.value, "This is bold")
\ No newline at end of file
+        self.assertEqual(html_node.value, "This is bold")
+
+    def test_link_props_shared(self):
+        first = text_node_to_html_node(TextNode("one", TextType.LINK, "/home"))
+        second = text_node_to_html_node(TextNode("two", TextType.LINK, "/home"))
+        self.assertEqual(first.props, {"href": "/home"})
+        self.assertIs(first.props, second.props)
+        with self.assertRaises(TypeError):
+            first.props["href"] = "/elsewhere"
+
+    def test_nested_emphasis(self):
+        node = TextNode(None, TextType.BOLD, children=[
+            TextNode("a ", TextType.TEXT),
+            TextNode("b", TextType.ITALIC),
+        ])
+        self.assertEqual(text_node_to_html_node(node).to_html(), "<b>a <i>b</i></b>")
+
+    def test_nodes_have_no_dict(self):
+        node = TextNode("text", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertFalse(hasattr(text_node_to_html_node(node), "__dict__"))
+
+
+if __name__ == "__main__":
+    unittest.main()
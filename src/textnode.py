@@ -1,5 +1,7 @@
 from enum import Enum
-from htmlnode import LeafNode
+from functools import lru_cache
+from types import MappingProxyType
+from htmlnode import LeafNode, ParentNode
 
 class TextType(Enum):
     TEXT = "text"
@@ -10,20 +12,44 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode:
-    def __init__(self, text, text_type, url=None):
+    # Bold and italic nodes with anything but plain text inside them have
+    # children instead of text
+    __slots__ = ("text", "text_type", "url", "children")
+
+    def __init__(self, text, text_type, url=None, children=None):
         self.text = text
         self.text_type = text_type
         self.url = url
+        self.children = children
 
     def __eq__(self, other):
         if isinstance(other, TextNode):
-            return self.text == other.text and self.text_type == other.text_type and self.url == other.url
+            return (
+                self.text == other.text and self.text_type == other.text_type
+                and self.url == other.url and self.children == other.children
+            )
         return False
     
     def __repr__(self):
+        if self.children is not None:
+            return f"TextNode({self.text}, {self.text_type}, {self.url}, {self.children})"
         return f"TextNode({self.text}, {self.text_type}, {self.url})"
     
+# Pages link to the same few URLs over and over, so link and image leaves
+# share one read-only props mapping per URL instead of a dict each
+@lru_cache(maxsize=4096)
+def link_props(url):
+    return MappingProxyType({"href": url})
+
+@lru_cache(maxsize=4096)
+def image_props(url, alt):
+    return MappingProxyType({"src": url, "alt": alt})
+
+_EMPHASIS_TAGS = {TextType.BOLD: "b", TextType.ITALIC: "i"}
+
 def text_node_to_html_node(text_node):
+    if text_node.children is not None:
+        return _nested_to_html_node(text_node)
     if text_node.text_type == TextType.TEXT:
         return LeafNode(None, text_node.text)
     if text_node.text_type == TextType.BOLD:
@@ -33,7 +59,25 @@ def text_node_to_html_node(text_node):
     if text_node.text_type == TextType.CODE:
         return LeafNode("code", text_node.text)
     if text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        return LeafNode("a", text_node.text, link_props(text_node.url))
     if text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-    raise ValueError(f"invalid text type: {text_node.text_type}")    
\ No newline at end of file
+        return LeafNode("img", "", image_props(text_node.url, text_node.text))
+    raise ValueError(f"invalid text type: {text_node.text_type}")
+
+def _nested_to_html_node(text_node):
+    # Emphasis can nest as deep as the markdown has delimiters, so walk it
+    # with an explicit stack rather than recursing
+    root = ParentNode(_EMPHASIS_TAGS[text_node.text_type], [])
+    stack = [(iter(text_node.children), root.children)]
+    while stack:
+        children, out = stack[-1]
+        for child in children:
+            if child.children is not None:
+                node = ParentNode(_EMPHASIS_TAGS[child.text_type], [])
+                out.append(node)
+                stack.append((iter(child.children), node.children))
+                break
+            out.append(text_node_to_html_node(child))
+        else:
+            stack.pop()
+    return root